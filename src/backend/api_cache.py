@@ -0,0 +1,136 @@
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+import data_processing
+from data_store import DataStore, data_store
+from update_data import DataProcessor
+
+
+# Tables whose files are watched, a new mtime on any of them rebuilds the cache
+API_SOURCES = ('race_results', 'standings', 'loop_data', 'race_data', 'calendar', 'track_data')
+RELOAD_CHECK_SECONDS = 5.0
+RECENT_TRACK_RACES = 10
+
+
+# Every response is serialized once per data version, requests only look bytes up
+@dataclass
+class ApiSnapshot:
+    version: tuple
+    seasons: bytes = b'[]'
+    race_info: bytes = b'{}'
+    last_races: dict = field(default_factory=dict)
+    standings: dict = field(default_factory=dict)
+    results: dict = field(default_factory=dict)
+    calendar: dict = field(default_factory=dict)
+    season_tracks: dict = field(default_factory=dict)
+    tracks: dict = field(default_factory=dict)
+    built_at: float = 0.0
+
+
+class ApiCache:
+    def __init__(self,
+                 processor: DataProcessor = None,
+                 store: DataStore = data_store,
+                 check_interval: float = RELOAD_CHECK_SECONDS):
+        self.processor = processor or DataProcessor()
+        self.store = store
+        self.check_interval = check_interval
+        self.current = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+        self.reload_thread = None
+        return
+
+    def get(self) -> ApiSnapshot:
+        if self.current is None:
+            with self.lock:
+                if self.current is None:
+                    self.current = self.build()
+                    self.checked_at = time.monotonic()
+            return self.current
+        if time.monotonic() - self.checked_at >= self.check_interval:
+            self.checked_at = time.monotonic()
+            self.check_sources()
+        return self.current
+
+    # New data is built next to the old snapshot, requests keep reading the old one until the swap
+    def check_sources(self) -> bool:
+        if self.source_version() == self.current.version:
+            return False
+        with self.lock:
+            if self.reload_thread is not None and self.reload_thread.is_alive():
+                return False
+            self.reload_thread = threading.Thread(target=self.reload, daemon=True)
+            self.reload_thread.start()
+        return True
+
+    def reload(self) -> None:
+        try:
+            snapshot = self.build()
+        except Exception:
+            logging.exception("API cache rebuild failed, serving the previous data")
+            return
+        self.current = snapshot
+        return
+
+    def source_version(self) -> tuple:
+        return tuple(self.store.version(name) for name in API_SOURCES)
+
+    def build(self) -> ApiSnapshot:
+        started = time.perf_counter()
+        version = self.source_version()
+        df, (next_race_data, last_race_data) = self.processor.get_stats()
+        race_results = self.store.load('race_results')
+        calendar = self.store.load('calendar')
+        calendar['race_date'] = pd.to_datetime(calendar['race_date'])
+        track_races = data_processing.compose_track_races(df)
+
+        snapshot = ApiSnapshot(version)
+        seasons = sorted(int(season_year) for season_year in race_results['season_year'].unique())
+        snapshot.seasons = to_json_bytes(seasons)
+        snapshot.race_info = to_json_bytes({**next_race_data, **last_race_data})
+        for season_year in seasons:
+            season_results = race_results[race_results['season_year'] == season_year]
+            last_race_number = int(season_results['race_number'].max())
+            snapshot.last_races[season_year] = last_race_number
+            for race_number, standings in enumerate(self.processor.get_season_standings(season_year, last_race_number), start=1):
+                snapshot.standings[(season_year, race_number)] = to_json_bytes(standings)
+            for race_number, results in season_results.groupby('race_number', sort=True):
+                raw_results = results.to_dict(orient='records')
+                snapshot.results[(season_year, int(race_number))] = to_json_bytes(
+                    {**data_processing.compose_race_results(raw_results), **data_processing.compose_race_details(raw_results)})
+            season_calendar = calendar[calendar['season_year'] == season_year].to_dict(orient='records')
+            snapshot.calendar[season_year] = to_json_bytes(data_processing.compose_calendar_data(season_calendar))
+            snapshot.season_tracks[season_year] = track_races[track_races['season_year'] == season_year].to_json(orient='records').encode('utf-8')
+        for track_name, races in track_races.groupby('track_name', sort=True):
+            snapshot.tracks[track_name] = to_json_bytes(compose_track_overview(races))
+        snapshot.built_at = time.time()
+        logging.info("API cache built in %.2fs", time.perf_counter() - started)
+        return snapshot
+
+
+# Per track averages over every race plus the latest races, like getTrackStats in TrackOverviewTable.jsx
+def compose_track_overview(races: pd.DataFrame) -> dict:
+    numeric = races.drop(columns=['season_year', 'race_number']).select_dtypes('number')
+    recent = races.sort_values(['season_year', 'race_number'], ascending=False).head(RECENT_TRACK_RACES)
+    return {'track_name': races['track_name'].iloc[0],
+            'race_count': len(races),
+            'stats': numeric.mean().round(4).to_dict(),
+            'recent_races': json.loads(recent.to_json(orient='records'))}
+
+
+def to_json_bytes(data) -> bytes:
+    return json.dumps(data, default=json_default).encode('utf-8')
+
+
+def json_default(value):
+    if isinstance(value, pd.Timestamp):
+        return value.strftime('%Y-%m-%d')
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
@@ -0,0 +1,84 @@
+import logging
+
+from flask import Flask, Response, request
+
+from api_cache import ApiCache, to_json_bytes
+
+
+API_HOST = '0.0.0.0'
+API_PORT = 5001
+
+app = Flask(__name__)
+cache = ApiCache()
+
+
+def json_response(body: bytes) -> Response:
+    if body is None:
+        return error_response('not found', 404)
+    return Response(body, mimetype='application/json')
+
+
+def error_response(message: str, status: int) -> Response:
+    return Response(to_json_bytes({'error': message}), status=status, mimetype='application/json')
+
+
+@app.get('/api/health')
+def health():
+    snapshot = cache.get()
+    return json_response(to_json_bytes({'version': list(snapshot.version), 'built_at': snapshot.built_at}))
+
+
+@app.get('/api/seasons')
+def seasons():
+    return json_response(cache.get().seasons)
+
+
+@app.get('/api/races')
+def race_info():
+    return json_response(cache.get().race_info)
+
+
+# Latest ingested race unless ?race= is given
+@app.get('/api/seasons/<int:season_year>/standings')
+def season_standings(season_year: int):
+    snapshot = cache.get()
+    race_number = snapshot.last_races.get(season_year)
+    if 'race' in request.args:
+        # args.get(type=int) would quietly fall back to the latest race on a bad value
+        try:
+            race_number = int(request.args['race'])
+        except ValueError:
+            return error_response('race must be an integer', 400)
+    return json_response(snapshot.standings.get((season_year, race_number)))
+
+
+@app.get('/api/seasons/<int:season_year>/races/<int:race_number>/standings')
+def race_standings(season_year: int, race_number: int):
+    return json_response(cache.get().standings.get((season_year, race_number)))
+
+
+@app.get('/api/seasons/<int:season_year>/races/<int:race_number>/results')
+def race_results(season_year: int, race_number: int):
+    return json_response(cache.get().results.get((season_year, race_number)))
+
+
+@app.get('/api/seasons/<int:season_year>/calendar')
+def calendar(season_year: int):
+    return json_response(cache.get().calendar.get(season_year))
+
+
+@app.get('/api/seasons/<int:season_year>/tracks')
+def season_tracks(season_year: int):
+    return json_response(cache.get().season_tracks.get(season_year))
+
+
+@app.get('/api/tracks/<path:track_name>')
+def track(track_name: str):
+    return json_response(cache.get().tracks.get(track_name))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    # Build everything before the first request instead of on it
+    cache.get()
+    app.run(host=API_HOST, port=API_PORT, threaded=True)
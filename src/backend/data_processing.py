@@ -3,12 +3,74 @@ sys.path.append('.')
 
 from collections import defaultdict, OrderedDict
 
+import numpy as np
 import pandas as pd
 
 from owners_to_teams import owners_to_teams
 from penalties import penalties_driver, penalties_team
 
-from standings_calculation import standings_calculation
+from standings_calculation import standings_pair_calculation, ArrayStandingsEngine, StandingsPair, STANDINGS_ENGINES
+
+CAR_STANDINGS_COLUMNS = ['season_points',
+                         'wins',
+                         'season_wins',
+                         'playoff_16_wins',
+                         'playoff_12_wins',
+                         'playoff_8_wins',
+                         'stage_wins',
+                         'race_stage_points',
+                         'race_finish_points',
+                         'playoff_points',
+                         'qualified_to_16',
+                         'qualified_to_12',
+                         'qualified_to_8',
+                         'qualified_to_final',
+                         'champion',
+                         'best_position',
+                         'n_best_positions']
+
+RACE_RESULT_COLUMNS = ['driver_name',
+                       'car_number',
+                       'team_name',
+                       'manufacturer',
+                       'race_pos',
+                       'quali_pos',
+                       'stage_1_pos',
+                       'stage_2_pos',
+                       'laps_led',
+                       'status']
+RESULT_VIEW_FIELDS = {'car_number': 'car_number', 'team': 'team_name', 'make': 'manufacturer'}
+# View name -> (position column, output field -> column, drop drivers without a position)
+RACE_RESULT_VIEWS = {
+    'Race': ('race_pos', {**RESULT_VIEW_FIELDS, 'laps_led': 'laps_led', 'status': 'status'}, False),
+    'Qualifying': ('quali_pos', RESULT_VIEW_FIELDS, False),
+    'Stage 1': ('stage_1_pos', RESULT_VIEW_FIELDS, True),
+    'Stage 2': ('stage_2_pos', RESULT_VIEW_FIELDS, True),
+}
+RACE_DETAILS_COLUMNS = ['driver_name',
+                        'race_pos',
+                        'laps_led',
+                        'status',
+                        'season_points',
+                        'finish_position_points',
+                        'stage_points',
+                        'playoff_points']
+RACE_DETAILS_FIELDS = {col: col for col in RACE_DETAILS_COLUMNS[2:]}
+TRACK_RACE_COLUMNS = ['track_name',
+                      'race_date',
+                      'cautions_number',
+                      'green_flag_percent',
+                      'average_green_flag_run_laps',
+                      'number_of_leaders',
+                      'average_leading_run_laps',
+                      'most_laps_led',
+                      'most_laps_led_driver',
+                      'most_laps_led_percent']
+# Driver level loop data rolled up to one value per race, same as track_data.json
+TRACK_RACE_AGGREGATIONS = {'green_flag_passes': 'sum',
+                           'quality_passes': 'sum',
+                           'total_laps': 'max',
+                           'driver_rating': 'mean'}
 
 def fix_team_names(team_names: list) -> list:
     return [owners_to_teams[sponsor.split('(')[-1].strip(')')] for sponsor in team_names]
@@ -63,138 +125,36 @@ def compose_calendar_data(calendar_data: dict):
     return ordered_calendar_data
 
 def compose_race_results(raw_race_results) -> dict:
-    race_data = pd.DataFrame({'driver_name': [res['driver_name'] for res in raw_race_results],
-                              'car_number': [res['car_number'] for res in raw_race_results],
-                              'team_name': [res['team_name'] for res in raw_race_results],
-                              'manufacturer': [res['manufacturer'] for res in raw_race_results],
-                              'race_pos': [res['race_pos'] for res in raw_race_results],
-                              'quali_pos': [res['quali_pos'] for res in raw_race_results],
-                              'laps_led': [res['laps_led'] for res in raw_race_results],
-                              'status': [res['status'] for res in raw_race_results]})
-    race_data = race_data.sort_values(by=['race_pos'], ascending=True)
-    results = {}
-    results['Race'] = {
-        drivers: {
-            'position': positions,
-            'car_number': car_numbers,
-            'team': teams,
-            'make': makes,
-            'laps_led': laps_leds,
-            'status': statuses,
-        } for (drivers, positions, car_numbers, teams, makes, laps_leds, statuses) in zip(
-                race_data['driver_name'].tolist(),
-                race_data['race_pos'].tolist(),
-                race_data['car_number'].tolist(),
-                race_data['team_name'].tolist(),
-                race_data['manufacturer'].tolist(),
-                race_data['laps_led'].tolist(),
-                race_data['status'].tolist(),
-        )}
-        
+    columns = make_result_columns(raw_race_results, RACE_RESULT_COLUMNS)
+    return {view_name: compose_result_view(columns, position_column, fields, positive_only)
+            for view_name, (position_column, fields, positive_only) in RACE_RESULT_VIEWS.items()}
 
-    quali_data = pd.DataFrame({'driver_name': [res['driver_name'] for res in raw_race_results],
-                            'car_number': [res['car_number'] for res in raw_race_results],
-                            'team_name': [res['team_name'] for res in raw_race_results],
-                            'manufacturer': [res['manufacturer'] for res in raw_race_results],
-                            'start_position': [res['quali_pos'] for res in raw_race_results],})
-    quali_data = quali_data.sort_values(by=['start_position'], ascending=True)
+def compose_race_details(raw_results: dict) -> dict:
+    columns = make_result_columns(raw_results, RACE_DETAILS_COLUMNS)
+    columns['status'] = np.where(columns['status'] == 'running', 'finished', columns['status'])
+    return {'Race Details': compose_result_view(columns, 'race_pos', RACE_DETAILS_FIELDS)}
 
-    results['Qualifying'] = {
-        drivers: {
-            'position': positions,
-            'car_number': car_numbers,
-            'team': teams,
-            'make': makes,
-        } for (drivers, positions, car_numbers, teams, makes) in zip(
-                quali_data['driver_name'].tolist(),
-                quali_data['start_position'].tolist(),
-                quali_data['car_number'].tolist(),
-                quali_data['team_name'].tolist(),
-                quali_data['manufacturer'].tolist(),
-        )}
+def make_result_columns(raw_results: list, columns: list) -> dict:
+    return {col: np.array([res[col] for res in raw_results]) for col in columns}
 
-    stage_1_data = pd.DataFrame({'driver_name': [res['driver_name'] for res in raw_race_results],
-                            'car_number': [res['car_number'] for res in raw_race_results],
-                            'team_name': [res['team_name'] for res in raw_race_results],
-                            'manufacturer': [res['manufacturer'] for res in raw_race_results],
-                            'stage_1_pos': [res['stage_1_pos'] for res in raw_race_results],})
-    stage_1_data = stage_1_data[stage_1_data['stage_1_pos'] > 0].sort_values(by=['stage_1_pos'], ascending=True)
-    results['Stage 1'] = {
-        drivers: {
-            'position': positions,
-            'car_number': car_numbers,
-            'team': teams,
-            'make': makes,
-        } for (drivers, positions, car_numbers, teams, makes) in zip(
-                stage_1_data['driver_name'].tolist(),
-                stage_1_data['stage_1_pos'].tolist(),
-                stage_1_data['car_number'].tolist(),
-                stage_1_data['team_name'].tolist(),
-                stage_1_data['manufacturer'].tolist(),
-        )}
+# Orders the shared columns by one position column and serializes straight to {driver: {field: value}}
+def compose_result_view(columns: dict, position_column: str, fields: dict, positive_only: bool = False) -> dict:
+    positions = columns[position_column]
+    order = np.argsort(positions, kind='stable')
+    if positive_only:
+        order = order[positions[order] > 0]
+    names = ['position'] + list(fields)
+    values = [positions[order].tolist()] + [columns[col][order].tolist() for col in fields.values()]
+    return {driver: dict(zip(names, row)) for driver, *row in zip(columns['driver_name'][order].tolist(), *values)}
 
-    stage_2_data = pd.DataFrame({'driver_name': [res['driver_name'] for res in raw_race_results],
-                            'car_number': [res['car_number'] for res in raw_race_results],
-                            'team_name': [res['team_name'] for res in raw_race_results],
-                            'manufacturer': [res['manufacturer'] for res in raw_race_results],
-                            'stage_2_pos': [res['stage_2_pos'] for res in raw_race_results],})
-    stage_2_data = stage_2_data[stage_2_data['stage_2_pos'] > 0].sort_values(by=['stage_2_pos'], ascending=True)
-    results['Stage 2'] = {
-        drivers: {
-            'position': positions,
-            'car_number': car_numbers,
-            'team': teams,
-            'make': makes,
-        } for (drivers, positions, car_numbers, teams, makes) in zip(
-                stage_2_data['driver_name'].tolist(),
-                stage_2_data['stage_2_pos'].tolist(),
-                stage_2_data['car_number'].tolist(),
-                stage_2_data['team_name'].tolist(),
-                stage_2_data['manufacturer'].tolist(),
-        )}
-    return results
+# One row per race with the race level stats of track_data.json
+def compose_track_races(df: pd.DataFrame) -> pd.DataFrame:
+    aggregations = {**{col: 'first' for col in TRACK_RACE_COLUMNS}, **TRACK_RACE_AGGREGATIONS}
+    races = df.groupby(['season_year', 'race_number'], sort=True).agg(aggregations).reset_index()
+    races['race_date'] = pd.to_datetime(races['race_date']).dt.strftime('%Y-%m-%d')
+    return races
 
-def compose_race_details(raw_results: dict) -> dict:
-    race_data = pd.DataFrame({'driver_name': [res['driver_name'] for res in raw_results],
-                              'race_pos': [res['race_pos'] for res in raw_results],
-                              'laps_led': [res['laps_led'] for res in raw_results],
-                              'status': [res['status'] for res in raw_results],
-                              'season_points': [res['season_points'] for res in raw_results],
-                              'finish_position_points': [res['finish_position_points'] for res in raw_results],
-                              'stage_points': [res['stage_points'] for res in raw_results],
-                              'playoff_points': [res['playoff_points'] for res in raw_results]})
-    race_data = race_data.sort_values(by=['race_pos'], ascending=True)
-
-    results = {}
-    results['Race Details'] = {
-        drivers: {
-            'position': positions,
-            'laps_led': laps_leds,
-            'status': statuses,
-            'season_points': season_pointses,
-            'finish_position_points': finish_position_pointses,
-            'stage_points': stage_pointses,
-            'playoff_points': playoff_pointses,
-        } for (drivers,
-               positions,
-               laps_leds,
-               statuses,
-               season_pointses,
-               finish_position_pointses,
-               stage_pointses,
-               playoff_pointses) in zip(
-                        race_data['driver_name'].tolist(),
-                        race_data['race_pos'].tolist(),
-                        race_data['laps_led'].tolist(),
-                        [status if status != 'running' else 'finished' for status in race_data['status'].tolist()],
-                        race_data['season_points'].tolist(),
-                        race_data['finish_position_points'].tolist(),
-                        race_data['stage_points'].tolist(),
-                        race_data['playoff_points'].tolist(),
-        )}
-    return results
-
-def compose_season_standings_data(raw_data: list[dict], race_number: str, current_season: str) -> list[dict]:
+def compose_season_standings_data(raw_data: list[dict], race_number: str, current_season: str, engine: str = 'pandas') -> list[dict]:
     raw_standings_data = pd.DataFrame({'driver_name': [res['driver_name'] for res in raw_data],
                                   'wins': [res['wins'] for res in raw_data],
                                   'stage_wins': [res['stage_wins'] for res in raw_data],
@@ -205,49 +165,53 @@ def compose_season_standings_data(raw_data: list[dict], race_number: str, curren
                                   'race_number': [res['race_number'] for res in raw_data],
                                   'race_pos': [res['race_pos'] for res in raw_data],
                                   })
-    standings_data = standings_calculation(raw_standings_data, int(race_number), int(current_season), penalties_driver)
+    standings_data, car_standings_data = standings_pair_calculation(raw_standings_data,
+                                                                    int(race_number),
+                                                                    int(current_season),
+                                                                    penalties_driver,
+                                                                    penalties_team,
+                                                                    engine)
     standings_data = standings_data.sort_values(
         by=['season_points', 'best_position', 'n_best_positions'],
         ascending=[False, True, False])
     standings_data['position'] = [x for x in range(1, len(standings_data) + 1)]
-
-    car_standings_data = standings_calculation(raw_standings_data, int(race_number), int(current_season), penalties_team)
-    car_standings_data = car_standings_data.sort_values(
-        by=['season_points', 'best_position', 'n_best_positions'],
-        ascending=[False, True, False])
-    car_standings_data['car_position'] = [x for x in range(1, len(car_standings_data) + 1)]
-    standings_cols = ['season_points',
-                    'wins',
-                    'season_wins',
-                    'playoff_16_wins',
-                    'playoff_12_wins',
-                    'playoff_8_wins',
-                    'stage_wins',
-                    'race_stage_points',
-                    'race_finish_points',
-                    'playoff_points',
-                    'qualified_to_16',
-                    'qualified_to_12',
-                    'qualified_to_8',
-                    'qualified_to_final',
-                    'champion',
-                    'best_position',
-                    'n_best_positions']
-    rename_cols = dict()
-    for col in standings_cols:
-        new_col_name = f"car_{col}"
-        rename_cols[col] = new_col_name
-        car_standings_data = car_standings_data.rename(columns=rename_cols)
-
-    # cols_to_use = ['driver_name', 'season_year', 'race_number', 'season_points', '']
-    standings_data = standings_data.merge(car_standings_data, on='driver_name')
+    standings_data = join_car_standings(standings_data, car_standings_data)
     standings_data['season_year'] = current_season
     standings_data['race_number'] = race_number
     return standings_data
 
-def compose_playoff_standings_data(raw_data: dict, race_number: str, season_year: str) -> dict:
+def compose_playoff_standings_data(raw_data: dict, race_number: str, season_year: str, engine: str = 'pandas') -> dict:
     race_number = int(race_number)
-    raw_standings_data = pd.DataFrame({'driver_name': [res['driver_name'] for res in raw_data],
+    raw_standings_data = make_raw_standings_frame(raw_data)
+    data, car_standings_data = standings_pair_calculation(raw_standings_data,
+                                                          race_number,
+                                                          int(season_year),
+                                                          penalties_driver,
+                                                          penalties_team,
+                                                          engine)
+    return compose_playoff_standings_snapshot(data, car_standings_data, race_number, season_year)
+
+def compose_playoff_standings_snapshots(raw_data: dict,
+                                       last_race_number: str,
+                                       season_year: str,
+                                       engine: str = 'pandas',
+                                       first_race_number: int = 1):
+    raw_standings_data = make_raw_standings_frame(raw_data)
+    pair = StandingsPair(STANDINGS_ENGINES[engine](raw_standings_data, int(season_year), penalties_driver), penalties_team)
+    for race_number, (data, car_standings_data) in pair.snapshots(int(last_race_number), first_race_number):
+        yield compose_playoff_standings_snapshot(data, car_standings_data, race_number, season_year)
+
+def compose_playoff_standings_from_totals(totals: list[dict], race_winners: dict, race_number: str, season_year: str) -> dict:
+    race_number = int(race_number)
+    totals = pd.DataFrame(totals)
+    pair = StandingsPair(ArrayStandingsEngine.from_totals(totals, race_winners, race_number, int(season_year), penalties_driver),
+                         penalties_team)
+    while pair.current_race < race_number:
+        pair.advance()
+    return compose_playoff_standings_snapshot(*pair.snapshot(), race_number, season_year)
+
+def make_raw_standings_frame(raw_data: dict) -> pd.DataFrame:
+    return pd.DataFrame({'driver_name': [res['driver_name'] for res in raw_data],
                                   'wins': [res['wins'] for res in raw_data],
                                   'race_pos': [res['race_pos'] for res in raw_data],
                                   'stage_wins': [res['stage_wins'] for res in raw_data],
@@ -256,9 +220,11 @@ def compose_playoff_standings_data(raw_data: dict, race_number: str, season_year
                                   'race_season_points': [res['race_season_points'] for res in raw_data],
                                   'initial_season_points': [res['race_season_points'] for res in raw_data],
                                   'race_number': [res['race_number'] for res in raw_data]})
-    
-    data = standings_calculation(raw_standings_data, race_number, int(season_year), penalties_driver)
 
+def compose_playoff_standings_snapshot(data: pd.DataFrame,
+                                       car_standings_data: pd.DataFrame,
+                                       race_number: int,
+                                       season_year: str) -> pd.DataFrame:
     if race_number <= 26:
         standings_data = compose_bubble(data, 16, 'season_wins')
     elif race_number <= 29:
@@ -274,39 +240,24 @@ def compose_playoff_standings_data(raw_data: dict, race_number: str, season_year
             standings_data[standings_data['season_points'] == standings_data['season_points'].max()]['season_points'].tolist()[0]
         standings_data['point_gap_to_leader'] = standings_data['point_gap_to_leader'].fillna(0).astype(int).astype(str)
 
-    car_standings_data = standings_calculation(raw_standings_data, int(race_number), int(season_year), penalties_team)
-    car_standings_data = car_standings_data.sort_values(
-        by=['season_points', 'best_position', 'n_best_positions'],
-        ascending=[False, True, False])
-    car_standings_data['car_position'] = [x for x in range(1, len(car_standings_data) + 1)]
-    standings_cols = ['season_points',
-                    'wins',
-                    'season_wins',
-                    'playoff_16_wins',
-                    'playoff_12_wins',
-                    'playoff_8_wins',
-                    'stage_wins',
-                    'race_stage_points',
-                    'race_finish_points',
-                    'playoff_points',
-                    'qualified_to_16',
-                    'qualified_to_12',
-                    'qualified_to_8',
-                    'qualified_to_final',
-                    'champion',
-                    'best_position',
-                    'n_best_positions']
-    rename_cols = dict()
-    for col in standings_cols:
-        new_col_name = f"car_{col}"
-        rename_cols[col] = new_col_name
-        car_standings_data = car_standings_data.rename(columns=rename_cols)
-
-    standings_data = standings_data.merge(car_standings_data, on='driver_name')
+    standings_data = join_car_standings(standings_data, car_standings_data)
     standings_data['season_year'] = season_year
     standings_data['race_number'] = race_number
     return standings_data
 
+def join_car_standings(standings_data: pd.DataFrame, car_standings_data: pd.DataFrame) -> pd.DataFrame:
+    car_standings_data = car_standings_data.sort_values(
+        by=['season_points', 'best_position', 'n_best_positions'],
+        ascending=[False, True, False])
+    car_standings = car_standings_data[CAR_STANDINGS_COLUMNS].set_axis(
+        [f'car_{col}' for col in CAR_STANDINGS_COLUMNS], axis='columns')
+    car_standings.index = car_standings_data['driver_name'].values
+    car_standings['car_position'] = np.arange(1, len(car_standings) + 1)
+    standings_data = standings_data.reset_index(drop=True)
+    car_standings = car_standings.reindex(standings_data['driver_name'].values)
+    car_standings.index = standings_data.index
+    return pd.concat([standings_data, car_standings], axis='columns')
+
 def compose_bubble(data: pd.DataFrame, playoff_drivers: int, wins_column: str) -> pd.DataFrame:
     standings_data = data.sort_values(by=[wins_column, 'season_points'], ascending=False).reset_index(drop=True)
     standings_data['pos'] = [x for x in range(1, len(standings_data) + 1)]
@@ -0,0 +1,330 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+CSV_DTYPES = {
+    'race_results': {
+        'driver_name': 'category',
+        'car_number': 'int64',
+        'team_name': 'category',
+        'manufacturer': 'object',
+        'season_year': 'int64',
+        'race_number': 'int64',
+        'race_pos': 'int64',
+        'quali_pos': 'int64',
+        'stage_1_pos': 'int64',
+        'stage_2_pos': 'int64',
+        'stage_3_pos': 'int64',
+        'laps_led': 'int64',
+        'status': 'object',
+        'season_points': 'int64',
+        'finish_position_points': 'int64',
+        'stage_points': 'int64',
+        'playoff_points': 'int64',
+    },
+    'standings': {
+        'driver_name': 'category',
+        'season_year': 'int64',
+        'race_number': 'int64',
+        'race_season_points': 'int64',
+        'wins': 'int64',
+        'stage_wins': 'int64',
+        'race_playoff_points': 'int64',
+        'race_finish_points': 'int64',
+        'race_stage_points': 'int64',
+    },
+    'race_data': {
+        'season_year': 'int64',
+        'race_number': 'int64',
+        'race_name': 'object',
+        'track_name': 'category',
+        'race_date': 'object',
+        'cautions_number': 'int64',
+        'green_flag_percent': 'float64',
+        'average_green_flag_run_laps': 'float64',
+        'number_of_leaders': 'int64',
+        'average_leading_run_laps': 'float64',
+        'most_laps_led': 'int64',
+        'most_laps_led_driver': 'object',
+        'most_laps_led_percent': 'float64',
+    },
+    'track_data': {
+        'track_name': 'category',
+        'track_short_name': 'object',
+        'track_type': 'object',
+        'track_type_short': 'object',
+        'track_length_mi': 'float64',
+    },
+    'calendar': {
+        'season_year': 'int64',
+        'race_number': 'int64',
+        'track_name': 'category',
+        'race_date': 'object',
+        'season_stage': 'object',
+    },
+    'loop_data': {
+        'driver_name': 'category',
+        'start_pos': 'int64',
+        'mid_race_pos': 'int64',
+        'finish_pos': 'int64',
+        'highest_pos': 'int64',
+        'lowest_pos': 'int64',
+        'avg_pos': 'float64',
+        'pass_diff': 'int64',
+        'green_flag_passes': 'int64',
+        'green_flag_times_passed': 'int64',
+        'quality_passes': 'int64',
+        'pct_quality_passes': 'float64',
+        'fastest_lap': 'int64',
+        'top_15_laps': 'int64',
+        'pct_top_15_laps': 'float64',
+        'laps_led': 'float64',
+        'pct_laps_led': 'float64',
+        'total_laps': 'int64',
+        'driver_rating': 'float64',
+        'season_year': 'int64',
+        'race_number': 'int64',
+    },
+    # Written by standings_snapshots, one row per (season_year, race_number, driver_name)
+    'standings_snapshot': {
+        'driver_name': 'object',
+        'season_points': 'int64',
+        'wins': 'int64',
+        'season_wins': 'int64',
+        'playoff_16_wins': 'int64',
+        'playoff_12_wins': 'int64',
+        'playoff_8_wins': 'int64',
+        'stage_wins': 'int64',
+        'race_stage_points': 'int64',
+        'race_finish_points': 'int64',
+        'playoff_points': 'int64',
+        'qualified_to_16': 'int64',
+        'qualified_to_12': 'int64',
+        'qualified_to_8': 'int64',
+        'qualified_to_final': 'int64',
+        'champion': 'int64',
+        'best_position': 'object',
+        'n_best_positions': 'object',
+        'pos': 'int64',
+        'point_gap_to_leader': 'object',
+        'point_gap_to_bubble': 'object',
+        'car_season_points': 'int64',
+        'car_wins': 'int64',
+        'car_season_wins': 'int64',
+        'car_playoff_16_wins': 'int64',
+        'car_playoff_12_wins': 'int64',
+        'car_playoff_8_wins': 'int64',
+        'car_stage_wins': 'int64',
+        'car_race_stage_points': 'int64',
+        'car_race_finish_points': 'int64',
+        'car_playoff_points': 'int64',
+        'car_qualified_to_16': 'int64',
+        'car_qualified_to_12': 'int64',
+        'car_qualified_to_8': 'int64',
+        'car_qualified_to_final': 'int64',
+        'car_champion': 'int64',
+        'car_best_position': 'object',
+        'car_n_best_positions': 'object',
+        'car_position': 'int64',
+        'season_year': 'int64',
+        'race_number': 'int64',
+    },
+}
+
+
+PARQUET_TABLES = ('race_results', 'standings', 'loop_data', 'race_data', 'calendar')
+SNAPSHOT_TABLE = 'standings_snapshot'
+PARQUET_TYPES = {
+    'int64': 'int64',
+    'float64': 'float64',
+    'object': 'string',
+    'category': 'dictionary',
+}
+
+
+class DataStore:
+    def __init__(self, data_dir: str = 'data'):
+        self.data_dir = data_dir
+        self._frames = {}
+        self._indexes = {}
+        self._mtimes = {}
+        return
+
+    def load(self, name: str, seasons: list = None, columns: list = None) -> pd.DataFrame:
+        return self._frame(name, seasons, columns).copy()
+
+    def view(self, name: str, **keys) -> pd.DataFrame:
+        frame = self._frame(name)
+        columns = tuple(sorted(keys))
+        index_key = (name, columns)
+        if index_key not in self._indexes:
+            grouped = frame.groupby(list(columns) if len(columns) > 1 else columns[0], observed=True, sort=False)
+            self._indexes[index_key] = grouped.indices
+        key = tuple(keys[col] for col in columns) if len(columns) > 1 else keys[columns[0]]
+        rows = self._indexes[index_key].get(key, [])
+        return frame.take(rows)
+
+    def race_view(self, name: str, season_year: int, race_number: int) -> pd.DataFrame:
+        return self.view(name, season_year=season_year, race_number=race_number)
+
+    def season_view(self, name: str, season_year: int) -> pd.DataFrame:
+        return self.view(name, season_year=season_year)
+
+    def driver_view(self, name: str, driver_name: str) -> pd.DataFrame:
+        return self.view(name, driver_name=driver_name)
+
+    def version(self, name: str, season_year: int = None) -> int:
+        season_dir = os.path.join(self.data_dir, name, f'season_year={season_year}')
+        if season_year is not None and os.path.isdir(season_dir):
+            return max([os.stat(os.path.join(season_dir, file)).st_mtime_ns for file in os.listdir(season_dir)] + [0])
+        return self._mtime(name, os.path.isdir(os.path.join(self.data_dir, name)))
+
+    def content_hash(self, name: str, season_year: int = None) -> str:
+        frame = self._frame(name, None if season_year is None else [int(season_year)])
+        return hashlib.sha256(pd.util.hash_pandas_object(frame, index=False).values.tobytes()).hexdigest()
+
+    def _frame(self, name: str, seasons: list = None, columns: list = None) -> pd.DataFrame:
+        is_parquet = os.path.isdir(os.path.join(self.data_dir, name))
+        mtime = self._mtime(name, is_parquet)
+        if self._mtimes.get(name) != mtime:
+            self._frames = {frame_key: frame for frame_key, frame in self._frames.items() if frame_key[0] != name}
+            self._indexes = {index_key: index for index_key, index in self._indexes.items() if index_key[0] != name}
+            self._mtimes[name] = mtime
+
+        if is_parquet:
+            # Season filters and column projections are pushed down to the Parquet reader
+            frame_key = (name,
+                         None if seasons is None else tuple(sorted(seasons)),
+                         None if columns is None else tuple(columns))
+            if frame_key not in self._frames:
+                self._frames[frame_key] = read_parquet_table(name, seasons, columns, self.data_dir)
+            return self._frames[frame_key]
+
+        frame_key = (name, None, None)
+        if frame_key not in self._frames:
+            self._frames[frame_key] = pd.read_csv(os.path.join(self.data_dir, f'{name}.csv'), dtype=CSV_DTYPES.get(name))
+        frame = self._frames[frame_key]
+        if seasons is not None:
+            frame = frame[frame['season_year'].isin(seasons)]
+        if columns is not None:
+            frame = frame[columns]
+        return frame
+
+    def _mtime(self, name: str, is_parquet: bool) -> int:
+        if not is_parquet:
+            return os.stat(os.path.join(self.data_dir, f'{name}.csv')).st_mtime_ns
+        return max([os.stat(os.path.join(root, file)).st_mtime_ns
+                    for root, _, files in os.walk(os.path.join(self.data_dir, name)) for file in files] + [0])
+
+
+def parquet_schema(name: str):
+    import pyarrow as pa
+
+    types = {
+        'int64': pa.int64(),
+        'float64': pa.float64(),
+        'string': pa.string(),
+        'dictionary': pa.dictionary(pa.int32(), pa.string()),
+    }
+    return pa.schema([(col, types[PARQUET_TYPES[dtype]])
+                      for col, dtype in CSV_DTYPES[name].items() if col != 'season_year'])
+
+
+def season_partition_path(name: str, season_year: int, data_dir: str = 'data', file_name: str = 'part-0.parquet') -> str:
+    return os.path.join(data_dir, name, f'season_year={season_year}', file_name)
+
+
+def race_fragment_name(race_number: int) -> str:
+    return f'race-{int(race_number):02d}.parquet'
+
+
+def manifest_path(name: str, data_dir: str = 'data') -> str:
+    return os.path.join(data_dir, name, '_manifest.json')
+
+
+def read_manifest(name: str, data_dir: str = 'data') -> dict:
+    path = manifest_path(name, data_dir)
+    if os.path.exists(path):
+        with open(path) as file:
+            return {int(season_year): set(race_numbers) for season_year, race_numbers in json.load(file).items()}
+    manifest = {}
+    if os.path.isdir(os.path.join(data_dir, name)):
+        races = read_parquet_table(name, columns=['season_year', 'race_number'], data_dir=data_dir).drop_duplicates()
+        for season_year, race_number in races.itertuples(index=False):
+            manifest.setdefault(int(season_year), set()).add(int(race_number))
+    return manifest
+
+
+def write_manifest(name: str, manifest: dict, data_dir: str = 'data') -> None:
+    path = manifest_path(name, data_dir)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump({str(season_year): sorted(race_numbers) for season_year, race_numbers in sorted(manifest.items())}, file)
+    os.replace(tmp_path, path)
+    return
+
+
+def read_parquet_table(name: str, seasons: list = None, columns: list = None, data_dir: str = 'data') -> pd.DataFrame:
+    filters = None if seasons is None else [('season_year', 'in', [int(season) for season in seasons])]
+    frame = pd.read_parquet(os.path.join(data_dir, name), columns=columns, filters=filters)
+    dtypes = {col: CSV_DTYPES[name][col] for col in (columns or CSV_DTYPES[name])}
+    # Text columns come back as the nullable string dtype, the CSV reader gives NaN for the same empty cells
+    for col in dtypes:
+        if dtypes[col] == 'object':
+            frame[col] = frame[col].to_numpy(dtype=object, na_value=np.nan)
+    frame = frame[list(dtypes)].astype(dtypes)
+    return frame.reset_index(drop=True)
+
+
+def write_season_partition(frame: pd.DataFrame,
+                           name: str,
+                           season_year: int,
+                           data_dir: str = 'data',
+                           file_name: str = 'part-0.parquet') -> None:
+    path = season_partition_path(name, season_year, data_dir, file_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    schema = parquet_schema(name)
+    # 'string' keeps missing values null, 'str' would store them as the text 'nan'
+    frame = frame.reindex(columns=schema.names).astype(
+        {col: 'string' if CSV_DTYPES[name][col] == 'object' else CSV_DTYPES[name][col] for col in schema.names})
+    tmp_path = os.path.join(os.path.dirname(path), f'.{os.path.basename(path)}.tmp')
+    frame.to_parquet(tmp_path, index=False, schema=schema)
+    os.replace(tmp_path, path)
+    return
+
+
+def convert_csv_to_parquet(name: str, data_dir: str = 'data') -> None:
+    frame = pd.read_csv(os.path.join(data_dir, f'{name}.csv'), dtype=CSV_DTYPES[name])
+    manifest = {}
+    for season_year, season_frame in frame.groupby('season_year'):
+        write_season_partition(season_frame, name, season_year, data_dir)
+        manifest[int(season_year)] = set(season_frame['race_number'].astype(int))
+    write_manifest(name, manifest, data_dir)
+    return
+
+
+def append_race_csv(frame: pd.DataFrame, name: str, data_dir: str = 'data') -> None:
+    path = os.path.join(data_dir, f'{name}.csv')
+    if os.path.exists(path):
+        columns = pd.read_csv(path, nrows=0).columns
+        frame.reindex(columns=columns).to_csv(path, mode='a', header=False, index=False)
+    else:
+        frame.to_csv(path, index=False)
+    return
+
+
+def export_csv(name: str, data_dir: str = 'data') -> None:
+    read_parquet_table(name, data_dir=data_dir).to_csv(os.path.join(data_dir, f'{name}.csv'), index=False)
+    return
+
+
+data_store = DataStore()
+
+
+if __name__ == "__main__":
+    for table_name in PARQUET_TABLES:
+        convert_csv_to_parquet(table_name)
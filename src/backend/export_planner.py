@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+
+from data_store import DataStore, data_store
+from entry_list import drivers_2025
+from penalties import penalties_driver, penalties_team
+from stats_aggregates import read_track_types
+
+
+EXPORT_STATE_PATH = 'data/export_state.json'
+# Bump when the export code changes what it writes, so every artifact is rebuilt once
+EXPORT_VERSION = 3
+SEASON_SOURCES = ('race_results', 'race_data', 'standings', 'loop_data', 'calendar')
+SHARED_SOURCES = ('track_data',)
+
+
+class ExportPlanner:
+    def __init__(self, store: DataStore = data_store, state_path: str = EXPORT_STATE_PATH):
+        self.store = store
+        self.state_path = state_path
+        self.state = read_export_state(state_path)
+        return
+
+    # Everything a season's standings_/data_/aggregates_ exports are computed from
+    def season_fingerprint(self, season_year: int, last_race_data: dict) -> str:
+        inputs = {name: self.store.content_hash(name, season_year) for name in SEASON_SOURCES}
+        inputs.update({name: self.store.content_hash(name) for name in SHARED_SOURCES})
+        inputs['track_types'] = read_track_types()
+        inputs['penalties'] = [penalties.season_records(int(season_year)) for penalties in (penalties_driver, penalties_team)]
+        inputs['export_version'] = EXPORT_VERSION
+        # Fantasy groups are only filled in for the season of the last race
+        if int(season_year) == int(last_race_data['last_race_season']):
+            inputs['last_race_number'] = int(last_race_data['last_race_number'])
+            inputs['entry_list'] = drivers_2025
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def is_stale(self, artifact: str, fingerprint: str, paths: list) -> bool:
+        return self.state.get(artifact) != fingerprint or not all(os.path.exists(path) for path in paths)
+
+    def mark_done(self, artifact: str, fingerprint: str) -> None:
+        self.state[artifact] = fingerprint
+        tmp_path = f'{self.state_path}.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(self.state, file, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+        return
+
+
+def read_export_state(state_path: str = EXPORT_STATE_PATH) -> dict:
+    if not os.path.exists(state_path):
+        return {}
+    with open(state_path) as file:
+        return json.load(file)
+
+
+def write_json_if_changed(path: str, data) -> bool:
+    content = json.dumps(data)
+    if os.path.exists(path):
+        with open(path) as file:
+            if file.read() == content:
+                return False
+    with open(path, 'w') as file:
+        file.write(content)
+    return True
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import zlib
+
+import pandas as pd
+
+
+EXPORT_DIR = '../../public/data'
+MANIFEST_FILE = 'manifest.json'
+COLUMNAR_SUFFIX = '.columnar.json'
+SHARD_KEY = 'race_number'
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+CHUNK_SIZE = 1 << 16
+
+
+class JsonExporter:
+    def __init__(self, export_dir: str = EXPORT_DIR, compress: bool = True):
+        self.export_dir = export_dir
+        self.compress = compress
+        self.brotli = load_brotli() if compress else None
+        self.manifest = read_export_manifest(export_dir)
+        return
+
+    # One columnar file for the whole season plus one shard per race under <name>/
+    def export_season(self, frame: pd.DataFrame, name: str, shard_key: str = SHARD_KEY) -> None:
+        stream = self.season_stream(name, shard_key)
+        stream.write(frame)
+        stream.close()
+        return
+
+    def season_stream(self, name: str, shard_key: str = SHARD_KEY):
+        return ColumnarSeasonStream(self, name, shard_key)
+
+    def write(self, file_name: str, content: str) -> bool:
+        path = os.path.join(self.export_dir, file_name)
+        tmp_path = temporary_path(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, 'wb') as file:
+            file.write(content.encode('utf-8'))
+        return self.publish(file_name, tmp_path)
+
+    # Moves an already written file into place, compressed copies and manifest entry included
+    def publish(self, file_name: str, tmp_path: str) -> bool:
+        path = os.path.join(self.export_dir, file_name)
+        digest = hashlib.sha256()
+        with open(tmp_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+        entry = self.manifest.get(file_name)
+        if entry is not None and entry['sha256'] == digest.hexdigest() and os.path.exists(path):
+            os.remove(tmp_path)
+            return False
+
+        entry = {'sha256': digest.hexdigest(), 'bytes': os.path.getsize(tmp_path)}
+        os.replace(tmp_path, path)
+        if self.compress:
+            gz = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            entry['gz_bytes'] = compress_file(path, f'{path}.gz', gz.compress, gz.flush)
+            if self.brotli is not None:
+                br = self.brotli.Compressor(quality=BROTLI_QUALITY)
+                entry['br_bytes'] = compress_file(path, f'{path}.br', br.process, br.finish)
+        self.manifest[file_name] = entry
+        return True
+
+    def save_manifest(self) -> None:
+        write_atomic(os.path.join(self.export_dir, MANIFEST_FILE),
+                     json.dumps(self.manifest, indent=2, sort_keys=True).encode('utf-8'))
+        return
+
+
+# Columnar season export fed one chunk (race) at a time: shards are written right away, column values
+# are spooled to one file per column and only stitched into <name>.columnar.json on close
+class ColumnarSeasonStream:
+    def __init__(self, exporter: JsonExporter, name: str, shard_key: str = SHARD_KEY):
+        self.exporter = exporter
+        self.name = name
+        self.shard_key = shard_key
+        self.columns = None
+        self.n_rows = 0
+        self.spool_dir = tempfile.mkdtemp(prefix=f'.{os.path.basename(name)}.', dir=exporter.export_dir)
+        return
+
+    def write(self, frame: pd.DataFrame) -> None:
+        if self.columns is None:
+            self.columns = [str(col) for col in frame.columns]
+        for i, col in enumerate(self.columns):
+            values = frame[col].to_json(orient='values')[1:-1]
+            if values:
+                with open(os.path.join(self.spool_dir, str(i)), 'a', encoding='utf-8') as file:
+                    file.write(f',{values}' if self.n_rows else values)
+        if self.shard_key in frame:
+            for key, shard in frame.groupby(self.shard_key, sort=True):
+                self.exporter.write(shard_path(self.name, self.shard_key, key), to_columnar_json(shard))
+        self.n_rows += len(frame)
+        return
+
+    def close(self) -> bool:
+        file_name = f'{self.name}{COLUMNAR_SUFFIX}'
+        tmp_path = temporary_path(os.path.join(self.exporter.export_dir, file_name))
+        columns = self.columns or []
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            file.write(f'{{"n_rows":{self.n_rows},"columns":{json.dumps(columns)},"data":{{')
+            for i, col in enumerate(columns):
+                file.write(f'{"," if i else ""}{json.dumps(col)}:[')
+                spool_path = os.path.join(self.spool_dir, str(i))
+                if os.path.exists(spool_path):
+                    with open(spool_path, encoding='utf-8') as spool:
+                        shutil.copyfileobj(spool, file, CHUNK_SIZE)
+                file.write(']')
+            file.write('}}')
+        shutil.rmtree(self.spool_dir)
+        return self.exporter.publish(file_name, tmp_path)
+
+
+# Writes a to_json(orient='records') array chunk by chunk, the file only replaces the old one on close
+class RecordsStreamWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self.tmp_path = temporary_path(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.file = open(self.tmp_path, 'w', encoding='utf-8')
+        self.file.write('[')
+        self.n_rows = 0
+        return
+
+    def write(self, frame: pd.DataFrame) -> None:
+        if len(frame) == 0:
+            return
+        records = frame.to_json(orient='records')[1:-1]
+        self.file.write(f',{records}' if self.n_rows else records)
+        self.n_rows += len(frame)
+        return
+
+    def close(self) -> None:
+        self.file.write(']')
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+        return
+
+
+# {"n_rows": N, "columns": [...], "data": {column: [values]}}, values encoded the same way to_json(orient='records') does
+def to_columnar_json(frame: pd.DataFrame) -> str:
+    data = ','.join(f'{json.dumps(str(col))}:{frame[col].to_json(orient="values")}' for col in frame.columns)
+    return f'{{"n_rows":{len(frame)},"columns":{json.dumps([str(col) for col in frame.columns])},"data":{{{data}}}}}'
+
+
+def shard_path(name: str, shard_key: str, key: int) -> str:
+    return f'{name}/{shard_key}_{int(key):02d}.json'
+
+
+def load_brotli():
+    try:
+        import brotli
+    except ImportError:
+        logging.warning("brotli is not installed, skipping .br exports")
+        return None
+    return brotli
+
+
+def read_export_manifest(export_dir: str = EXPORT_DIR) -> dict:
+    path = os.path.join(export_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def temporary_path(path: str) -> str:
+    return os.path.join(os.path.dirname(path), f'.{os.path.basename(path)}.tmp')
+
+
+def compress_file(path: str, compressed_path: str, compress, finish) -> int:
+    tmp_path = temporary_path(compressed_path)
+    with open(path, 'rb') as source, open(tmp_path, 'wb') as target:
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+            target.write(compress(chunk))
+        target.write(finish())
+    os.replace(tmp_path, compressed_path)
+    return os.path.getsize(compressed_path)
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = temporary_path(path)
+    with open(tmp_path, 'wb') as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+    return
@@ -3,99 +3,72 @@ Types:
     - season_points
     - playoff_points
     - race_win
+
+Penalties live in data/penalties.json, bump "version" whenever a record is added or rescinded.
 '''
+import json
+import os
+from dataclasses import asdict, dataclass
+
+
+PENALTIES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'penalties.json')
+PENALTY_TYPES = ('season_points', 'playoff_points', 'race_win')
+
+
+@dataclass(frozen=True)
+class Penalty:
+    id: int
+    season: int
+    race: int
+    driver_name: str
+    type: str
+    amount: int = 0
+
+
+class PenaltyIndex:
+    def __init__(self, records: list, version: int = 0):
+        self.version = version
+        self.records = records
+        self.by_race = {}
+        self.by_season = {}
+        for record in records:
+            if record.type not in PENALTY_TYPES:
+                raise ValueError(f"Unknown penalty type '{record.type}', expected one of {PENALTY_TYPES}")
+            self.by_race.setdefault((record.season, record.race), []).append(record)
+            self.by_season.setdefault(record.season, []).append(record)
+        return
+
+    def for_race(self, season: int, race: int) -> list:
+        return self.by_race.get((season, race), [])
+
+    def for_season(self, season: int) -> list:
+        return self.by_season.get(season, [])
+
+    def same_season(self, other, season: int) -> bool:
+        def key(record: Penalty) -> tuple:
+            return record.season, record.race, record.driver_name, record.type, record.amount
+        return [key(record) for record in self.for_season(season)] == [key(record) for record in other.for_season(season)]
+
+    def season_records(self, season: int) -> list:
+        return [asdict(record) for record in self.for_season(season)]
+
+
+def load_penalties(path: str = PENALTIES_PATH) -> tuple:
+    with open(path) as file:
+        data = json.load(file)
+    version = int(data['version'])
+    return (version,
+            PenaltyIndex([Penalty(**record) for record in data['driver']], version),
+            PenaltyIndex([Penalty(**record) for record in data['team']], version))
+
+
+def first_changed_race(old_records: list, new_records: list) -> int:
+    # Earliest race whose penalties differ, snapshots before it are unaffected
+    changed = [record for record in old_records if record not in new_records] + \
+              [record for record in new_records if record not in old_records]
+    if not changed:
+        return None
+    return min(record['race'] for record in changed)
+
 
-penalties_driver = {
-    1: {
-        'season': 2024,
-        'driver_name': 'Denny Hamlin',
-        'type': 'playoff_points',
-        'amount': 10,
-        'race': 24,
-    },
-    2: {
-        'season': 2024,
-        'driver_name': 'Austin Dillon',
-        'type': 'race_win',
-        'race': 23,
-    },
-    3: {
-        'season': 2025,
-        'driver_name': 'Austin Cindric',
-        'type': 'season_points',
-        'amount': 50,
-        'race': 3,
-    },
-    4: {
-        'season': 2025,
-        'driver_name': 'Todd Gilliland',
-        'type': 'season_points',
-        'amount': 10,
-        'race': 2,
-    },
-    5: {
-        'season': 2025,
-        'driver_name': 'Cody Ware',
-        'type': 'season_points',
-        'amount': 10,
-        'race': 2,
-    },
-    6: {
-        'season': 2025,
-        'driver_name': 'Chris Buescher',
-        'type': 'season_points',
-        'amount': 60,
-        'race': 12,
-    },
-    7: {
-        'season': 2025,
-        'driver_name': 'Chris Buescher',
-        'type': 'playoff_points',
-        'amount': 5,
-        'race': 12,
-    },
-}
-
-penalties_team = {
-    1: {
-        'season': 2024,
-        'driver_name': 'Denny Hamlin',
-        'type': 'playoff_points',
-        'amount': 10,
-        'race': 24,
-    },
-    2: {
-        'season': 2024,
-        'driver_name': 'Austin Dillon',
-        'type': 'race_win',
-        'race': 23,
-    },
-    3: {
-        'season': 2025,
-        'driver_name': 'Todd Gilliland',
-        'type': 'season_points',
-        'amount': 10,
-        'race': 2,
-    },
-    4: {
-        'season': 2025,
-        'driver_name': 'Cody Ware',
-        'type': 'season_points',
-        'amount': 10,
-        'race': 2,
-    },
-    5: {
-        'season': 2025,
-        'driver_name': 'Chris Buescher',
-        'type': 'season_points',
-        'amount': 60,
-        'race': 12,
-    },
-    6: {
-        'season': 2025,
-        'driver_name': 'Chris Buescher',
-        'type': 'playoff_points',
-        'amount': 5,
-        'race': 12,
-    },
-}
+penalties_version, penalties_driver, penalties_team = load_penalties()
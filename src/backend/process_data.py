@@ -1,8 +1,33 @@
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
+from data_store import data_store, CSV_DTYPES
+
 seasons = [2022, 2023, 2024, 2025]
 
+# Any other status counts as a failure
+STATUS_GROUPS = {'running': 'finished', 'crash': 'crash', 'disqualified': 'dq'}
+STATUS_DEFAULT = 'failure'
+RARE_TRACK_TYPES = {'Daytona Intl. Speedway Road Course': 'Road Course',
+                    'Bristol Motor Speedway Dirt Track': 'Short Track',
+                    'Dover International Speedway': 'Intermediate',
+                    'Indianapolis Grand Prix Circuit': 'Road Course'}
+# Indexed by stage position, 0 means the driver was outside the stage top 10
+STAGE_POINTS = np.array([0, 10, 9, 8, 7, 6, 5, 4, 3, 2, 1])
+STAGE_POINTS_COLUMNS = {'stage_1_pos': 'stage_1_pts', 'stage_2_pos': 'stage_2_pts', 'stage_3_pos': 'stage_3_pts'}
+
+RACE_KEYS = ['season_year', 'race_number']
+DRIVER_RACE_KEYS = ['season_year', 'race_number', 'driver_name']
+# (table, projected columns, join keys, how), joined onto race_results in this order
+DATASET_JOINS = [
+    ('race_data', [col for col in CSV_DTYPES['race_data'] if col != 'race_name'], RACE_KEYS, 'inner'),
+    ('track_data', ['track_name', 'track_type'], ['track_name'], 'left'),
+    ('standings', None, DRIVER_RACE_KEYS, 'inner'),
+    ('calendar', RACE_KEYS + ['season_stage'], RACE_KEYS, 'inner'),
+    ('loop_data', [col for col in CSV_DTYPES['loop_data'] if col != 'laps_led'], DRIVER_RACE_KEYS, 'left'),
+]
+
 
 class FeatureProcessor:
 
@@ -12,28 +37,21 @@ class FeatureProcessor:
         return data
     
     def load_data_csv(self) -> pd.DataFrame:
-        res = pd.read_csv('data/race_results.csv')
-        race_data = pd.read_csv('data/race_data.csv')
-        race_data_cols = [col for col in race_data.columns if col not in ['race_name']]
-        df = res.merge(race_data[race_data_cols], on=['season_year', 'race_number'], how='inner')
-
-        track = pd.read_csv('data/track_data.csv')
-        track_cols = ['track_name', 'track_type']
-        df = df.merge(track[track_cols], on='track_name', how='left')
-
-        standings = pd.read_csv('data/standings.csv')
-        standings_cols = [col for col in standings.columns]
-        df = df.merge(standings[standings_cols], on=['season_year', 'race_number', 'driver_name'], how='inner')
-        df['race_date'] = pd.to_datetime(df['race_date'])
-        df = df.sort_values(['driver_name', 'race_date'])
-        calendar = pd.read_csv('data/calendar.csv')
+        # Every source is filtered to the selected seasons and projected before it is joined
+        base = data_store.load('race_results', seasons=seasons)
+        sources = [(data_store.load(name,
+                                    seasons=seasons if 'season_year' in CSV_DTYPES[name] else None,
+                                    columns=columns), keys, how)
+                   for name, columns, keys, how in DATASET_JOINS]
+        for source, _, _ in sources:
+            if 'race_date' in source:
+                source['race_date'] = pd.to_datetime(source['race_date'])
+        df = DatasetPlan(base, sources).materialize(['driver_name', 'race_date'])
+        df['track_name'] = df['track_name'].astype('object')
+
+        calendar = data_store.load('calendar')
         calendar['race_date'] = pd.to_datetime(calendar['race_date']).dt.date
         calendar['track_type'] = 'Superspeedway'
-        df = df.merge(calendar[['season_year', 'race_number', 'season_stage']], on=['season_year', 'race_number'])
-        loop_data = pd.read_csv('data/loop_data.csv')
-        loop_data = loop_data.drop(columns='laps_led')
-        df = df.merge(loop_data, on=['season_year', 'race_number', 'driver_name'], how='left')
-        df = df[df['season_year'].isin(seasons)].reset_index(drop=True)
         self._get_next_race(calendar)
         return df
     
@@ -59,44 +77,97 @@ class FeatureProcessor:
         return
     
     def process_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = self.process_status(df)
-        df = self.process_rare_tracks(df)
-        df = self.stage_pos_to_points(df)
-        return df
+        # Every transform reads the original columns, the results are assigned in one go
+        features = {}
+        for transform in (self.process_status, self.process_rare_tracks, self.stage_pos_to_points):
+            features.update(transform(df))
+        return df.assign(**features)
 
-    def process_status(self, df: pd.DataFrame) -> pd.DataFrame:
-        status_map = dict()
-        for val in df['status'].values:
-            if val == 'running':
-                status_map[val] = 'finished'
-            elif val == 'crash':
-                status_map[val] = 'crash'
-            elif val == 'disqualified':
-                status_map[val] = 'dq'
-            else:
-                status_map[val] = 'failure'
-        for status, new_status in status_map.items():
-            df.loc[df['status'] == status, 'status'] = new_status
-        return df
-    
-    def process_rare_tracks(self, df: pd.DataFrame) -> pd.DataFrame:
-        track_types = {'Daytona Intl. Speedway Road Course': 'Road Course',
-            'Bristol Motor Speedway Dirt Track': 'Short Track',
-            'Dover International Speedway': 'Intermediate',
-            'Indianapolis Grand Prix Circuit': 'Road Course'}
-        for track_name, track_type in track_types.items():
-            df.loc[df['track_name'] == track_name, 'track_type'] = track_type
-        return df
+    def process_status(self, df: pd.DataFrame) -> dict:
+        return {'status': map_values(df['status'], STATUS_GROUPS, STATUS_DEFAULT)}
+
+    def process_rare_tracks(self, df: pd.DataFrame) -> dict:
+        is_rare_track = df['track_name'].isin(list(RARE_TRACK_TYPES)).values
+        return {'track_type': np.where(is_rare_track, map_values(df['track_name'], RARE_TRACK_TYPES), df['track_type'].values)}
 
     def fill_stage_nan(self, df: pd.DataFrame) -> pd.DataFrame:
         for col in ['stage_1_pos', 'stage_2_pos', 'stage_3_pos']:
             df.loc[df[col] == 0, col] = float('nan')
         return df
     
-    def stage_pos_to_points(self, df: pd.DataFrame) -> pd.DataFrame:
-        stage_points_map = {1: 10, 2: 9, 3: 8, 4: 7, 5: 6, 6: 5, 7: 4, 8: 3, 9: 2, 10: 1, 0: 0}
-        for col in ['stage_1_pos', 'stage_2_pos', 'stage_3_pos']:
-            stage_points = [stage_points_map[int(pos)] for pos in df[col].values]
-            new_col = '_'.join(col.split('_')[:2] + ['pts'])
-            df[new_col] = stage_points
-        return df
+    def stage_pos_to_points(self, df: pd.DataFrame) -> dict:
+        return {points_col: STAGE_POINTS[df[pos_col].values.astype(np.int64)]
+                for pos_col, points_col in STAGE_POINTS_COLUMNS.items()}
+
+
+# Joins sources onto a base frame the way chained inner/left merges would, but only resolves row indexers
+# while planning: each join is one int64 surrogate key lookup, columns are taken once in the final order
+class DatasetPlan:
+    def __init__(self, base: pd.DataFrame, sources: list):
+        self.base = base
+        self.joins = []
+        keep = np.ones(len(base), dtype=bool)
+        for source, keys, how in sources:
+            left_key, right_key = self._surrogate_keys([self.column(col) for col in keys], [source[col] for col in keys])
+            matchable = np.flatnonzero(right_key >= 0)
+            right_index = pd.Index(right_key[matchable])
+            if not right_index.is_unique:
+                raise ValueError(f"Join keys {keys} are not unique in the joined table")
+            indexer = right_index.get_indexer(left_key)
+            indexer = np.where(indexer >= 0, matchable[indexer], -1)
+            if how == 'inner':
+                keep &= indexer >= 0
+            self.joins.append((source.drop(columns=keys), indexer))
+        self.rows = np.flatnonzero(keep)
+        return
+
+    # Values of a column for every base row, from the base or from the source joined for it
+    def column(self, col: str) -> pd.Series:
+        if col in self.base:
+            return self.base[col]
+        for source, indexer in self.joins:
+            if col in source:
+                return take_rows(source[col], indexer)
+        raise KeyError(col)
+
+    def materialize(self, sort_by: list) -> pd.DataFrame:
+        order = pd.DataFrame({col: self.column(col).values[self.rows] for col in sort_by}).sort_values(sort_by).index
+        rows = self.rows[order]
+        columns = {col: self.base[col].take(rows).values for col in self.base}
+        for source, indexer in self.joins:
+            columns.update({col: take_rows(source[col], indexer[rows]).values for col in source})
+        return pd.DataFrame(columns)
+
+    def _surrogate_keys(self, left_columns: list, right_columns: list) -> tuple:
+        # Integer keys are packed as they are, other keys are coded against the values on the left,
+        # right values missing on the left get -1 and can never match
+        left_key = np.zeros(len(left_columns[0]), dtype=np.int64)
+        right_key = np.zeros(len(right_columns[0]), dtype=np.int64)
+        for left_values, right_values in zip(left_columns, right_columns):
+            if pd.api.types.is_integer_dtype(left_values):
+                width = int(max(left_values.max(), right_values.max(), 0)) + 1
+                left_codes = left_values.values.astype(np.int64)
+                right_codes = right_values.values.astype(np.int64)
+            else:
+                values = pd.Index(left_values.unique()).dropna()
+                width = len(values) + 1
+                left_codes = values.get_indexer(left_values)
+                right_codes = values.get_indexer(right_values)
+            left_key = left_key * width + left_codes
+            right_key = np.where((right_key < 0) | (right_codes < 0), -1, right_key * width + right_codes)
+        return left_key, right_key
+
+
+def take_rows(values: pd.Series, indexer: np.ndarray) -> pd.Series:
+    if (indexer >= 0).all():
+        return values.take(indexer)
+    # Rows without a match are filled with NaN like a left merge would
+    return pd.Series(pd.api.extensions.take(values.values, indexer, allow_fill=True))
+
+
+# Unique values are mapped once and spread back through the factorized codes, missing values stay missing
+def map_values(values: pd.Series, mapping: dict, default: str = None) -> np.ndarray:
+    codes, uniques = pd.factorize(values)
+    lookup = np.array([mapping.get(value, value if default is None else default) for value in uniques] + [np.nan],
+                      dtype=object)
+    return lookup[codes]
@@ -1,188 +1,572 @@
+import copy
+
+import numpy as np
 import pandas as pd
 
+from penalties import PenaltyIndex
+
+
+class StandingsEngine:
+    def __init__(self, raw_data: pd.DataFrame, season: int, penalties: PenaltyIndex):
+        self.season = season
+        self.penalties = penalties
+        self.all_drivers = raw_data['driver_name'].unique()
+        self.race_rows = {
+            race: (race_data['driver_name'].values,
+                   race_data['race_season_points'].values,
+                   race_data['race_pos'].values,
+                   race_data['wins'].values,
+                   race_data['stage_wins'].values,
+                   race_data['race_finish_points'].values)
+            for race, race_data in (raw_data
+                                    .drop_duplicates(subset=['race_number', 'driver_name'])
+                                    .groupby('race_number', sort=False))}
+        self.totals = raw_data[
+            ['driver_name', 'stage_wins', 'race_stage_points', 'race_finish_points']
+            ].groupby('driver_name').sum().reindex(self.all_drivers, fill_value=0)
+        self._reset()
+        return
+
+    # Same race data under other penalties, only valid before the first advance()
+    def fork(self, penalties: PenaltyIndex):
+        engine = copy.copy(self)
+        engine.penalties = penalties
+        engine._reset()
+        return engine
+
+    def _reset(self) -> None:
+        self.current_race = 0
+        self.season_points = {driver: 0 for driver in self.all_drivers}
+        self.pure_season_points = {driver: 0 for driver in self.all_drivers}
+        self.season_wins = {}
+        self.positions = {driver: [] for driver in self.all_drivers}
+        self.playoff_16_wins = {}
+        self.playoff_12_wins = {}
+        self.playoff_8_wins = {}
+        self.playoff_points = {driver: 0 for driver in self.all_drivers}
+        self.playoff_16_drivers = []
+        self.playoff_12_drivers = []
+        self.playoff_8_drivers = []
+        self.playoff_4_drivers = []
+        self.champion = None
+        return
+
+    def advance(self) -> int:
+        race = self.current_race + 1
+        race_rows = self.race_rows.get(race, ((), (), (), (), (), ()))
 
-def standings_calculation(raw_data: pd.DataFrame, current_race: int, season: int, penalties: dict):
-    data = raw_data[raw_data['race_number'] <= current_race].reset_index(drop=True)
-    all_drivers = raw_data['driver_name'].unique()
-    season_points = {driver: 0 for driver in all_drivers}
-    pure_season_points = {driver: 0 for driver in all_drivers}
-    season_wins = {}
-    positions = {driver: [] for driver in all_drivers}
-    playoff_16_wins = {}
-    playoff_12_wins = {}
-    playoff_8_wins = {}
-    playoff_points = {driver: 0 for driver in all_drivers}
-    playoff_16_drivers = []
-    playoff_12_drivers = []
-    playoff_8_drivers = []
-    playoff_4_drivers = []
-    champion = None
-    for race in range(1, current_race + 1):
-        race_data = data[data['race_number'] == race]
-        
         if race < 27:
             # Regular season
-            for driver in race_data['driver_name'].unique():
-                race_points = race_data[race_data['driver_name'] == driver]['race_season_points'].values[0]
-                season_points[driver] += race_points
-                pure_season_points[driver] += race_points
-                positions[driver].append(race_data[race_data['driver_name'] == driver]['race_pos'].values[0])
-                playoff_points[driver] += 5 * race_data[race_data['driver_name'] == driver]['wins'].values[0] + \
-                    race_data[race_data['driver_name'] == driver]['stage_wins'].values[0]
-                if race_data[race_data['driver_name'] == driver]['wins'].values[0] == 1:
-                    season_wins[driver] = season_wins.get(driver, 0) + 1
+            self._add_race_points(race_rows, [], {})
         if race == 27:
-            playoff_16_drivers = [driver for driver, _ in sorted(season_wins.items(), key=lambda item: item[1], reverse=True)]
-            top_points_drivers = [driver for driver, _ in sorted(season_points.items(), key=lambda item: item[1], reverse=True)]
-            i = 0
-            while len(playoff_16_drivers) < 16:
-                if top_points_drivers[i] not in playoff_16_drivers:
-                    playoff_16_drivers.append(top_points_drivers[i])
-                i += 1
+            self.playoff_16_drivers = self._playoff_cut(self.season_wins, 16)
+            top_points_drivers = self._top_points_drivers()
             season_standings_points = [15, 10, 8, 7, 6, 5, 4, 3, 2, 1]
             i = 0
             for driver in top_points_drivers[:10]:
-                if driver in playoff_16_drivers:
-                    playoff_points[driver] += season_standings_points[i]
+                if driver in self.playoff_16_drivers:
+                    self.playoff_points[driver] += season_standings_points[i]
                 i += 1
-            for driver in playoff_16_drivers:
-                season_points[driver] = 2000
-                season_points[driver] += playoff_points[driver]
-                pure_season_points[driver] = season_points[driver]
+            for driver in self.playoff_16_drivers:
+                self.season_points[driver] = 2000
+                self.season_points[driver] += self.playoff_points[driver]
+                self.pure_season_points[driver] = self.season_points[driver]
         if race in (27, 28, 29):
-            for driver in race_data['driver_name'].unique():
-                race_points = race_data[race_data['driver_name'] == driver]['race_season_points'].values[0]
-                season_points[driver] += race_points
-                pure_season_points[driver] += race_points
-                positions[driver].append(race_data[race_data['driver_name'] == driver]['race_pos'].values[0])
-                playoff_points[driver] += 5 * race_data[race_data['driver_name'] == driver]['wins'].values[0] + \
-                    race_data[race_data['driver_name'] == driver]['stage_wins'].values[0]
-                if race_data[race_data['driver_name'] == driver]['wins'].values[0] == 1:
-                    if driver in playoff_16_drivers:
-                        playoff_16_wins[driver] = playoff_16_wins.get(driver, 0) + 1
-                    else:
-                        season_wins[driver] = season_wins.get(driver, 0) + 1
+            self._add_race_points(race_rows, self.playoff_16_drivers, self.playoff_16_wins)
         if race == 30:
-            playoff_12_drivers = [driver for driver, _ in sorted(playoff_16_wins.items(), key=lambda item: item[1], reverse=True)]
-            top_points_drivers = [driver for driver, _ in sorted(season_points.items(), key=lambda item: item[1], reverse=True)]
-            i = 0
-            while len(playoff_12_drivers) < 12:
-                if top_points_drivers[i] not in playoff_12_drivers:
-                    playoff_12_drivers.append(top_points_drivers[i])
-                i += 1
-            for driver in playoff_12_drivers:
-                season_points[driver] = 3000
-                season_points[driver] += playoff_points[driver]
+            self.playoff_12_drivers = self._playoff_cut(self.playoff_16_wins, 12)
+            for driver in self.playoff_12_drivers:
+                self.season_points[driver] = 3000
+                self.season_points[driver] += self.playoff_points[driver]
         if race in (30, 31, 32):
-            for driver in race_data['driver_name'].unique():
-                race_points = race_data[race_data['driver_name'] == driver]['race_season_points'].values[0]
-                season_points[driver] += race_points
-                pure_season_points[driver] += race_points
-                positions[driver].append(race_data[race_data['driver_name'] == driver]['race_pos'].values[0])
-                playoff_points[driver] += 5 * race_data[race_data['driver_name'] == driver]['wins'].values[0] + \
-                    race_data[race_data['driver_name'] == driver]['stage_wins'].values[0]
-                if race_data[race_data['driver_name'] == driver]['wins'].values[0] == 1:
-                    if driver in playoff_12_drivers:
-                        playoff_12_wins[driver] = playoff_12_wins.get(driver, 0) + 1
-                    else:
-                        season_wins[driver] = season_wins.get(driver, 0) + 1
+            self._add_race_points(race_rows, self.playoff_12_drivers, self.playoff_12_wins)
         if race == 33:
-            playoff_8_drivers = [driver for driver, _ in sorted(playoff_12_wins.items(), key=lambda item: item[1], reverse=True)]
-            top_points_drivers = [driver for driver, _ in sorted(season_points.items(), key=lambda item: item[1], reverse=True)]
-            i = 0
-            while len(playoff_8_drivers) < 8:
-                if top_points_drivers[i] not in playoff_8_drivers:
-                    playoff_8_drivers.append(top_points_drivers[i])
-                i += 1
-            for driver in playoff_8_drivers:
-                season_points[driver] = 4000
-                season_points[driver] += playoff_points[driver]
-            for driver in playoff_12_drivers:
-                if driver not in playoff_8_drivers:
-                    season_points[driver] = pure_season_points[driver]
+            self.playoff_8_drivers = self._playoff_cut(self.playoff_12_wins, 8)
+            for driver in self.playoff_8_drivers:
+                self.season_points[driver] = 4000
+                self.season_points[driver] += self.playoff_points[driver]
+            for driver in self.playoff_12_drivers:
+                if driver not in self.playoff_8_drivers:
+                    self.season_points[driver] = self.pure_season_points[driver]
         if race in (33, 34, 35):
-            for driver in race_data['driver_name'].unique():
-                race_points = race_data[race_data['driver_name'] == driver]['race_season_points'].values[0]
-                season_points[driver] += race_points
-                pure_season_points[driver] += race_points
-                positions[driver].append(race_data[race_data['driver_name'] == driver]['race_pos'].values[0])
-                playoff_points[driver] += 5 * race_data[race_data['driver_name'] == driver]['wins'].values[0] + \
-                    race_data[race_data['driver_name'] == driver]['stage_wins'].values[0]
-                if race_data[race_data['driver_name'] == driver]['wins'].values[0] == 1:
-                    if driver in playoff_8_drivers:
-                        playoff_8_wins[driver] = playoff_8_wins.get(driver, 0) + 1
-                    else:
-                        season_wins[driver] = season_wins.get(driver, 0) + 1
+            self._add_race_points(race_rows, self.playoff_8_drivers, self.playoff_8_wins)
         if race == 36:
-            playoff_4_drivers = [driver for driver, _ in sorted(playoff_8_wins.items(), key=lambda item: item[1], reverse=True)]
-            top_points_drivers = [driver for driver, _ in sorted(season_points.items(), key=lambda item: item[1], reverse=True)]
-            i = 0
-            while len(playoff_4_drivers) < 4:
-                if top_points_drivers[i] not in playoff_4_drivers:
-                    playoff_4_drivers.append(top_points_drivers[i])
-                i += 1
-            for driver in playoff_4_drivers:
-                season_points[driver] = 5000
-            for driver in playoff_8_drivers:
-                if driver not in playoff_4_drivers:
-                    season_points[driver] = pure_season_points[driver]
-            for driver in race_data['driver_name'].unique():
-                if driver in playoff_4_drivers:
-                    season_points[driver] += race_data[race_data['driver_name'] == driver]['race_finish_points'].values[0]
+            self.playoff_4_drivers = self._playoff_cut(self.playoff_8_wins, 4)
+            for driver in self.playoff_4_drivers:
+                self.season_points[driver] = 5000
+            for driver in self.playoff_8_drivers:
+                if driver not in self.playoff_4_drivers:
+                    self.season_points[driver] = self.pure_season_points[driver]
+            drivers, race_season_points, _, _, _, race_finish_points = race_rows
+            for driver, race_points, finish_points in zip(drivers, race_season_points, race_finish_points):
+                if driver in self.playoff_4_drivers:
+                    self.season_points[driver] += finish_points
                 else:
-                    pure_season_points[driver] += race_data[race_data['driver_name'] == driver]['race_season_points'].values[0]
-            champion = [driver for driver, _ in sorted(season_points.items(), key=lambda item: item[1], reverse=True)][0]
-            for driver in season_points.keys():
-                if driver not in playoff_4_drivers:
-                    season_points[driver] = pure_season_points[driver]
-        season_points, playoff_points, season_wins, playoff_16_wins, playoff_12_wins, playoff_8_wins = apply_penalties(season,
-                                                                     race,
-                                                                     season_points,
-                                                                     playoff_points,
-                                                                     season_wins,
-                                                                     playoff_16_wins,
-                                                                     playoff_12_wins,
-                                                                     playoff_8_wins,
-                                                                     penalties)
-    data = raw_data[
-        ['driver_name', 'stage_wins', 'race_stage_points', 'race_finish_points']
-        ].groupby('driver_name', as_index=False).sum()
-    best_position = {}
-    n_best_positions = {}
-    for driver in all_drivers:
-        if len(positions[driver]) > 0:
-            best_position[driver] = min(positions[driver])
-            n_best_positions[driver] = sum([1 if pos == min(positions[driver]) else 0 for pos in positions[driver]])
+                    self.pure_season_points[driver] += race_points
+            self.champion = self._top_points_drivers()[0]
+            for driver in self.season_points.keys():
+                if driver not in self.playoff_4_drivers:
+                    self.season_points[driver] = self.pure_season_points[driver]
+        (self.season_points,
+         self.playoff_points,
+         self.season_wins,
+         self.playoff_16_wins,
+         self.playoff_12_wins,
+         self.playoff_8_wins) = apply_penalties(self.season,
+                                                race,
+                                                self.season_points,
+                                                self.playoff_points,
+                                                self.season_wins,
+                                                self.playoff_16_wins,
+                                                self.playoff_12_wins,
+                                                self.playoff_8_wins,
+                                                self.penalties)
+        self.current_race = race
+        return race
+
+    def snapshots(self, last_race: int, first_race: int = 1):
+        while self.current_race < last_race:
+            race = self.advance()
+            if race >= first_race:
+                yield race, self.snapshot()
+
+    def snapshot(self) -> pd.DataFrame:
+        all_drivers = self.all_drivers
+        best_position = {}
+        n_best_positions = {}
+        for driver in all_drivers:
+            positions = self.positions[driver]
+            if len(positions) > 0:
+                best_position[driver] = min(positions)
+                n_best_positions[driver] = sum([1 if pos == best_position[driver] else 0 for pos in positions])
+            else:
+                best_position[driver] = '-'
+                n_best_positions[driver] = '-'
+
+        standings = pd.DataFrame({'driver_name': all_drivers,
+                        'season_points': [self.season_points[driver] for driver in all_drivers],
+                        'wins': [self.season_wins.get(driver, 0) + \
+                                self.playoff_16_wins.get(driver, 0) + \
+                                self.playoff_12_wins.get(driver, 0) + \
+                                self.playoff_8_wins.get(driver, 0) + \
+                                (driver == self.champion) for driver in all_drivers],
+                        'season_wins': [self.season_wins.get(driver, 0) for driver in all_drivers],
+                        'playoff_16_wins': [self.playoff_16_wins.get(driver, 0) for driver in all_drivers],
+                        'playoff_12_wins': [self.playoff_12_wins.get(driver, 0) for driver in all_drivers],
+                        'playoff_8_wins': [self.playoff_8_wins.get(driver, 0) for driver in all_drivers],
+                        'stage_wins': self.totals['stage_wins'].values,
+                        'race_stage_points': self.totals['race_stage_points'].values,
+                        'race_finish_points': self.totals['race_finish_points'].values,
+                        'playoff_points': [self.playoff_points[driver] for driver in all_drivers],
+                        'qualified_to_16': [1 if driver in self.playoff_16_drivers else 0 for driver in all_drivers],
+                        'qualified_to_12': [1 if driver in self.playoff_12_drivers else 0 for driver in all_drivers],
+                        'qualified_to_8': [1 if driver in self.playoff_8_drivers else 0 for driver in all_drivers],
+                        'qualified_to_final': [1 if driver in self.playoff_4_drivers else 0 for driver in all_drivers],
+                        'champion': [1 if driver == self.champion else 0 for driver in all_drivers],
+                        'best_position': [best_position[driver] for driver in all_drivers],
+                        'n_best_positions': [n_best_positions[driver] for driver in all_drivers],})
+        return standings
+
+    def _add_race_points(self, race_rows: tuple, playoff_drivers: list, playoff_wins: dict) -> None:
+        for driver, race_points, race_pos, wins, stage_wins, _ in zip(*race_rows):
+            self.season_points[driver] += race_points
+            self.pure_season_points[driver] += race_points
+            self.positions[driver].append(race_pos)
+            self.playoff_points[driver] += 5 * wins + stage_wins
+            if wins == 1:
+                if driver in playoff_drivers:
+                    playoff_wins[driver] = playoff_wins.get(driver, 0) + 1
+                else:
+                    self.season_wins[driver] = self.season_wins.get(driver, 0) + 1
+        return
+
+    def _top_points_drivers(self) -> list:
+        return [driver for driver, _ in sorted(self.season_points.items(), key=lambda item: item[1], reverse=True)]
+
+    def _playoff_cut(self, wins: dict, n_drivers: int) -> list:
+        playoff_drivers = [driver for driver, _ in sorted(wins.items(), key=lambda item: item[1], reverse=True)]
+        top_points_drivers = self._top_points_drivers()
+        i = 0
+        while len(playoff_drivers) < n_drivers:
+            if top_points_drivers[i] not in playoff_drivers:
+                playoff_drivers.append(top_points_drivers[i])
+            i += 1
+        return playoff_drivers
+
+
+NO_POSITION = np.iinfo(np.int64).max
+PLAYOFF_STANDINGS_POINTS = [15, 10, 8, 7, 6, 5, 4, 3, 2, 1]
+# Last race before each playoff cut and the last race with tracked positions
+STANDINGS_CHECKPOINTS = (26, 29, 32, 35)
+
+
+class ArrayStandingsEngine:
+    def __init__(self, raw_data: pd.DataFrame, season: int, penalties: PenaltyIndex):
+        all_drivers = raw_data['driver_name'].unique()
+        totals = raw_data[
+            ['driver_name', 'stage_wins', 'race_stage_points', 'race_finish_points']
+            ].groupby('driver_name').sum().reindex(all_drivers, fill_value=0)
+
+        data = raw_data.drop_duplicates(subset=['race_number', 'driver_name'])
+        n_drivers = len(all_drivers)
+        n_races = max([36] + data['race_number'].tolist())
+        driver_idx = pd.Index(all_drivers).get_indexer(data['driver_name'])
+        race_idx = data['race_number'].values - 1
+
+        def pivot(col: str, fill_value: int = 0) -> np.ndarray:
+            values = np.full((n_drivers, n_races), fill_value, dtype=np.int64)
+            values[driver_idx, race_idx] = data[col].values
+            return values
+
+        race_season_points = pivot('race_season_points')
+        race_finish_points = pivot('race_finish_points')
+        # Finishing positions are only tracked up to race 35
+        self.positions = pivot('race_pos', NO_POSITION)
+        self.positions[:, 35:] = NO_POSITION
+        self.best_positions = np.minimum.accumulate(self.positions, axis=1)
+
+        winners = data[data['wins'] == 1]
+        race_winners = {race: race_data['driver_name'].tolist()
+                        for race, race_data in winners.groupby('race_number', sort=False)}
+        self._setup(season,
+                    penalties,
+                    all_drivers,
+                    totals,
+                    cumulative_by_race(race_season_points),
+                    cumulative_by_race(5 * pivot('wins') + pivot('stage_wins')),
+                    race_season_points[:, 35],
+                    race_finish_points[:, 35],
+                    race_winners)
+        return
+
+    # Built from per-driver sums at STANDINGS_CHECKPOINTS and at race_number (see DBReader.get_standings_totals),
+    # such an engine can only be advanced up to race_number
+    @classmethod
+    def from_totals(cls, totals: pd.DataFrame, race_winners: dict, race_number: int, season: int, penalties: PenaltyIndex):
+        engine = cls.__new__(cls)
+        n_drivers = len(totals)
+        n_races = 36
+        cum_season_points = np.zeros((n_drivers, n_races + 1), dtype=np.int64)
+        cum_playoff_points = np.zeros((n_drivers, n_races + 1), dtype=np.int64)
+        # Rounds only read the running sums right before a playoff cut and at the requested race
+        for race in STANDINGS_CHECKPOINTS + ('n',):
+            col = race_number if race == 'n' else race
+            if col <= min(race_number, 35):
+                cum_season_points[:, col] = totals[f'season_points_{race}'].values
+                cum_playoff_points[:, col] = totals[f'playoff_points_{race}'].values
+
+        engine.positions = None
+        has_position = totals['best_position'].notna().values
+        engine.best_positions = (np.where(has_position, totals['best_position'].fillna(0).astype(np.int64), NO_POSITION),
+                                 totals['n_best_positions'].fillna(0).astype(np.int64).values)
+        engine._setup(season,
+                      penalties,
+                      totals['driver_name'].values,
+                      totals.set_index('driver_name')[['stage_wins', 'race_stage_points', 'race_finish_points']],
+                      cum_season_points,
+                      cum_playoff_points,
+                      totals['final_race_season_points'].values.astype(np.int64),
+                      totals['final_race_finish_points'].values.astype(np.int64),
+                      race_winners)
+        return engine
+
+    # Same race data under other penalties, only valid before the first advance()
+    def fork(self, penalties: PenaltyIndex):
+        engine = copy.copy(self)
+        engine._setup(self.season,
+                      penalties,
+                      self.all_drivers,
+                      self.totals,
+                      self.cum_pure_season_points,
+                      self.cum_race_playoff_points,
+                      self.final_race_season_points,
+                      self.final_race_finish_points,
+                      self.race_winners)
+        return engine
+
+    def _setup(self,
+               season: int,
+               penalties: PenaltyIndex,
+               all_drivers: np.ndarray,
+               totals: pd.DataFrame,
+               cum_pure_season_points: np.ndarray,
+               cum_race_playoff_points: np.ndarray,
+               final_race_season_points: np.ndarray,
+               final_race_finish_points: np.ndarray,
+               race_winners: dict) -> None:
+        self.season = season
+        self.penalties = penalties
+        self.current_race = 0
+        self.all_drivers = all_drivers
+        self.driver_index = {driver: i for i, driver in enumerate(self.all_drivers)}
+        self.totals = totals
+        self.final_race_season_points = final_race_season_points
+        self.final_race_finish_points = final_race_finish_points
+        self.race_winners = race_winners
+
+        n_drivers = len(all_drivers)
+        n_races = cum_pure_season_points.shape[1] - 1
+        season_penalties = np.zeros((n_drivers, n_races), dtype=np.int64)
+        playoff_penalties = np.zeros((n_drivers, n_races), dtype=np.int64)
+        self.win_penalties = {}
+        for record in penalties.for_season(season):
+            if not (1 <= record.race <= n_races):
+                continue
+            if record.type == 'season_points':
+                season_penalties[self.driver_index[record.driver_name], record.race - 1] += record.amount
+            elif record.type == 'playoff_points':
+                playoff_penalties[self.driver_index[record.driver_name], record.race - 1] += record.amount
+            elif record.type == 'race_win':
+                self.win_penalties.setdefault(record.race, []).append(record.driver_name)
+        self.season_penalties = season_penalties
+        self.playoff_penalties = playoff_penalties
+        self.cum_season_points = cum_pure_season_points - cumulative_by_race(season_penalties)
+        self.cum_pure_season_points = cum_pure_season_points
+        self.cum_race_playoff_points = cum_race_playoff_points
+        self.cum_playoff_points = cum_race_playoff_points - cumulative_by_race(playoff_penalties)
+
+        self.round_start = 1
+        self.round_season_points = np.zeros(n_drivers, dtype=np.int64)
+        self.round_pure_season_points = np.zeros(n_drivers, dtype=np.int64)
+        self.round_playoff_points = np.zeros(n_drivers, dtype=np.int64)
+        self.season_points = np.zeros(n_drivers, dtype=np.int64)
+        self.pure_season_points = np.zeros(n_drivers, dtype=np.int64)
+        self.playoff_points = np.zeros(n_drivers, dtype=np.int64)
+        self.season_wins = {}
+        self.playoff_16_wins = {}
+        self.playoff_12_wins = {}
+        self.playoff_8_wins = {}
+        self.playoff_16_drivers = []
+        self.playoff_12_drivers = []
+        self.playoff_8_drivers = []
+        self.playoff_4_drivers = []
+        self.champion = None
+        return
+
+    def advance(self) -> int:
+        race = self.current_race + 1
+        if race in (27, 30, 33):
+            self._start_playoff_round(race)
+        if race == 36:
+            self._final_race()
         else:
-            best_position[driver] = '-'
-            n_best_positions[driver] = '-'
-        
-    standings = pd.DataFrame({'driver_name': all_drivers,
-                    'season_points': [season_points[driver] for driver in all_drivers],
-                    'wins': [season_wins.get(driver, 0) + \
-                            playoff_16_wins.get(driver, 0) + \
-                            playoff_12_wins.get(driver, 0) + \
-                            playoff_8_wins.get(driver, 0) + \
-                            (driver == champion) for driver in all_drivers],
-                    'season_wins': [season_wins.get(driver, 0) for driver in all_drivers],
-                    'playoff_16_wins': [playoff_16_wins.get(driver, 0) for driver in all_drivers],
-                    'playoff_12_wins': [playoff_12_wins.get(driver, 0) for driver in all_drivers],
-                    'playoff_8_wins': [playoff_8_wins.get(driver, 0) for driver in all_drivers],
-                    'stage_wins': [data[data['driver_name'] == driver]['stage_wins'].values[0] \
-                                    if driver in data['driver_name'].unique() else 0 for driver in all_drivers],
-                    'race_stage_points': [data[data['driver_name'] == driver]['race_stage_points'].values[0] \
-                                    if driver in data['driver_name'].unique() else 0 for driver in all_drivers],
-                    'race_finish_points': [data[data['driver_name'] == driver]['race_finish_points'].values[0] \
-                                    if driver in data['driver_name'].unique() else 0 for driver in all_drivers],
-                    'playoff_points': [playoff_points[driver] for driver in all_drivers],
-                    'qualified_to_16': [1 if driver in playoff_16_drivers else 0 for driver in all_drivers],
-                    'qualified_to_12': [1 if driver in playoff_12_drivers else 0 for driver in all_drivers],
-                    'qualified_to_8': [1 if driver in playoff_8_drivers else 0 for driver in all_drivers],
-                    'qualified_to_final': [1 if driver in playoff_4_drivers else 0 for driver in all_drivers],
-                    'champion': [1 if driver == champion else 0 for driver in all_drivers],
-                    'best_position': [best_position[driver] for driver in all_drivers],
-                    'n_best_positions': [n_best_positions[driver] for driver in all_drivers],})
-    return standings
+            self._add_round_points(race)
+            self._add_race_wins(race)
+        self._apply_win_penalties(race)
+        self.current_race = race
+        return race
+
+    def snapshots(self, last_race: int, first_race: int = 1):
+        while self.current_race < last_race:
+            race = self.advance()
+            if race >= first_race:
+                yield race, self.snapshot()
+
+    def snapshot(self) -> pd.DataFrame:
+        race = self.current_race
+        if self.positions is None:
+            best_position, n_best_positions = self.best_positions
+        elif race > 0:
+            best_position = self.best_positions[:, race - 1]
+            n_best_positions = (self.positions[:, :race] == best_position[:, None]).sum(axis=1)
+        else:
+            best_position = np.full(len(self.all_drivers), NO_POSITION, dtype=np.int64)
+            n_best_positions = np.zeros(len(self.all_drivers), dtype=np.int64)
+        has_position = best_position < NO_POSITION
+        if not has_position.all():
+            best_position = best_position.astype(object)
+            n_best_positions = n_best_positions.astype(object)
+            best_position[~has_position] = '-'
+            n_best_positions[~has_position] = '-'
+
+        season_wins = self._counts(self.season_wins)
+        playoff_16_wins = self._counts(self.playoff_16_wins)
+        playoff_12_wins = self._counts(self.playoff_12_wins)
+        playoff_8_wins = self._counts(self.playoff_8_wins)
+        champion = self.all_drivers == self.champion
+        standings = pd.DataFrame({'driver_name': self.all_drivers,
+                        'season_points': self.season_points,
+                        'wins': season_wins + playoff_16_wins + playoff_12_wins + playoff_8_wins + champion,
+                        'season_wins': season_wins,
+                        'playoff_16_wins': playoff_16_wins,
+                        'playoff_12_wins': playoff_12_wins,
+                        'playoff_8_wins': playoff_8_wins,
+                        'stage_wins': self.totals['stage_wins'].values,
+                        'race_stage_points': self.totals['race_stage_points'].values,
+                        'race_finish_points': self.totals['race_finish_points'].values,
+                        'playoff_points': self.playoff_points,
+                        'qualified_to_16': self._mask(self.playoff_16_drivers).astype(np.int64),
+                        'qualified_to_12': self._mask(self.playoff_12_drivers).astype(np.int64),
+                        'qualified_to_8': self._mask(self.playoff_8_drivers).astype(np.int64),
+                        'qualified_to_final': self._mask(self.playoff_4_drivers).astype(np.int64),
+                        'champion': champion.astype(np.int64),
+                        'best_position': best_position,
+                        'n_best_positions': n_best_positions,})
+        return standings
+
+    def _add_round_points(self, race: int) -> None:
+        start = self.round_start - 1
+        self.season_points = self.round_season_points + \
+            self.cum_season_points[:, race] - self.cum_season_points[:, start]
+        self.pure_season_points = self.round_pure_season_points + \
+            self.cum_pure_season_points[:, race] - self.cum_pure_season_points[:, start]
+        self.playoff_points = self.round_playoff_points + \
+            self.cum_playoff_points[:, race] - self.cum_playoff_points[:, start]
+        return
+
+    def _start_playoff_round(self, race: int) -> None:
+        season_points = self.season_points.copy()
+        pure_season_points = self.pure_season_points.copy()
+        playoff_points = self.playoff_points.copy()
+        if race == 27:
+            self.playoff_16_drivers = self._playoff_cut(self.season_wins, 16)
+            playoff_drivers = self._mask(self.playoff_16_drivers)
+            top_10 = self._top_points_order()[:10]
+            bonus_drivers = top_10[playoff_drivers[top_10]]
+            playoff_points[bonus_drivers] += np.array(PLAYOFF_STANDINGS_POINTS[:len(top_10)])[playoff_drivers[top_10]]
+            season_points[playoff_drivers] = 2000 + playoff_points[playoff_drivers]
+            pure_season_points[playoff_drivers] = season_points[playoff_drivers]
+        elif race == 30:
+            self.playoff_12_drivers = self._playoff_cut(self.playoff_16_wins, 12)
+            playoff_drivers = self._mask(self.playoff_12_drivers)
+            season_points[playoff_drivers] = 3000 + playoff_points[playoff_drivers]
+        elif race == 33:
+            self.playoff_8_drivers = self._playoff_cut(self.playoff_12_wins, 8)
+            playoff_drivers = self._mask(self.playoff_8_drivers)
+            eliminated = self._mask(self.playoff_12_drivers) & ~playoff_drivers
+            season_points[playoff_drivers] = 4000 + playoff_points[playoff_drivers]
+            season_points[eliminated] = pure_season_points[eliminated]
+        self.round_start = race
+        self.round_season_points = season_points
+        self.round_pure_season_points = pure_season_points
+        self.round_playoff_points = playoff_points
+        return
+
+    def _final_race(self) -> None:
+        self.playoff_4_drivers = self._playoff_cut(self.playoff_8_wins, 4)
+        final_drivers = self._mask(self.playoff_4_drivers)
+        eliminated = self._mask(self.playoff_8_drivers) & ~final_drivers
+        season_points = self.season_points.copy()
+        pure_season_points = self.pure_season_points.copy()
+        season_points[final_drivers] = 5000 + self.final_race_finish_points[final_drivers]
+        season_points[eliminated] = pure_season_points[eliminated]
+        pure_season_points[~final_drivers] += self.final_race_season_points[~final_drivers]
+        self.champion = self.all_drivers[np.argmax(season_points)]
+        season_points[~final_drivers] = pure_season_points[~final_drivers]
+        self.season_points = season_points - self.season_penalties[:, 35]
+        self.pure_season_points = pure_season_points
+        self.playoff_points = self.playoff_points - self.playoff_penalties[:, 35]
+        return
+
+    def _add_race_wins(self, race: int) -> None:
+        playoff_drivers, playoff_wins = self._round_wins(race)
+        for driver in self.race_winners.get(race, []):
+            if driver in playoff_drivers:
+                playoff_wins[driver] = playoff_wins.get(driver, 0) + 1
+            else:
+                self.season_wins[driver] = self.season_wins.get(driver, 0) + 1
+        return
+
+    def _apply_win_penalties(self, race: int) -> None:
+        if race <= 26:
+            wins = self.season_wins
+        elif race <= 35:
+            wins = self._round_wins(race)[1]
+        else:
+            return
+        for driver in self.win_penalties.get(race, []):
+            wins[driver] = wins.get(driver, 0) - 1
+            delete_loser(wins, driver)
+        return
+
+    def _round_wins(self, race: int) -> tuple:
+        if race <= 26:
+            return [], self.season_wins
+        if race <= 29:
+            return self.playoff_16_drivers, self.playoff_16_wins
+        if race <= 32:
+            return self.playoff_12_drivers, self.playoff_12_wins
+        return self.playoff_8_drivers, self.playoff_8_wins
+
+    def _top_points_order(self) -> np.ndarray:
+        return np.argsort(-self.season_points, kind='stable')
+
+    def _playoff_cut(self, wins: dict, n_drivers: int) -> list:
+        playoff_drivers = [driver for driver, _ in sorted(wins.items(), key=lambda item: item[1], reverse=True)]
+        for driver in self.all_drivers[self._top_points_order()]:
+            if len(playoff_drivers) >= n_drivers:
+                break
+            if driver not in playoff_drivers:
+                playoff_drivers.append(driver)
+        return playoff_drivers
+
+    def _mask(self, drivers: list) -> np.ndarray:
+        mask = np.zeros(len(self.all_drivers), dtype=bool)
+        mask[[self.driver_index[driver] for driver in drivers]] = True
+        return mask
+
+    def _counts(self, wins: dict) -> np.ndarray:
+        counts = np.zeros(len(self.all_drivers), dtype=np.int64)
+        for driver, n_wins in wins.items():
+            counts[self.driver_index[driver]] = n_wins
+        return counts
+
+
+STANDINGS_ENGINES = {
+    'pandas': StandingsEngine,
+    'numpy': ArrayStandingsEngine,
+}
+
+
+# Driver and owner (car) standings advanced together over one set of race data. The owner
+# side only gets accumulators of its own when its penalties differ from the drivers' that season
+class StandingsPair:
+    def __init__(self, engine, car_penalties: PenaltyIndex):
+        self.engine = engine
+        self.car_engine = None
+        if not engine.penalties.same_season(car_penalties, engine.season):
+            self.car_engine = engine.fork(car_penalties)
+        return
+
+    @property
+    def current_race(self) -> int:
+        return self.engine.current_race
+
+    def advance(self) -> int:
+        race = self.engine.advance()
+        if self.car_engine is not None:
+            self.car_engine.advance()
+        return race
+
+    def snapshot(self) -> tuple:
+        data = self.engine.snapshot()
+        if self.car_engine is None:
+            return data, data
+        return data, self.car_engine.snapshot()
+
+    def snapshots(self, last_race: int, first_race: int = 1):
+        while self.current_race < last_race:
+            race = self.advance()
+            if race >= first_race:
+                yield race, self.snapshot()
+
+
+def standings_calculation(raw_data: pd.DataFrame, current_race: int, season: int, penalties: PenaltyIndex, engine: str = 'pandas'):
+    engine = STANDINGS_ENGINES[engine](raw_data, season, penalties)
+    while engine.current_race < current_race:
+        engine.advance()
+    return engine.snapshot()
+
+def standings_pair_calculation(raw_data: pd.DataFrame,
+                               current_race: int,
+                               season: int,
+                               penalties: PenaltyIndex,
+                               car_penalties: PenaltyIndex,
+                               engine: str = 'pandas') -> tuple:
+    pair = StandingsPair(STANDINGS_ENGINES[engine](raw_data, season, penalties), car_penalties)
+    while pair.current_race < current_race:
+        pair.advance()
+    return pair.snapshot()
 
 def apply_penalties(season: int,
                     current_race: int,
@@ -192,29 +576,32 @@ def apply_penalties(season: int,
                     playoff_16_wins: dict,
                     playoff_12_wins: dict,
                     playoff_8_wins: dict,
-                    penalties: dict):
-    for _, record in penalties.items():
-        if (record['season'] == season) and (record['race'] == current_race):
-            if record['type'] == 'season_points':
-                season_points[record['driver_name']] -= record['amount']
-            elif record['type'] == 'playoff_points':
-                playoff_points[record['driver_name']] -= record['amount']
-            elif record['type'] == 'race_win':
-                if current_race <= 26:
-                    season_wins[record['driver_name']] = season_wins.get(record['driver_name'], 0) - 1
-                    season_wins = delete_loser(season_wins, record['driver_name'])
-                elif current_race <= 29:
-                    playoff_16_wins[record['driver_name']] = playoff_16_wins.get(record['driver_name'], 0) - 1
-                    playoff_16_wins = delete_loser(playoff_16_wins, record['driver_name'])
-                elif current_race <= 32:
-                    playoff_12_wins[record['driver_name']] = playoff_12_wins.get(record['driver_name'], 0) - 1
-                    playoff_12_wins = delete_loser(playoff_12_wins, record['driver_name'])
-                elif current_race <= 35:
-                    playoff_8_wins[record['driver_name']] = playoff_8_wins.get(record['driver_name'], 0) - 1
-                    playoff_8_wins = delete_loser(playoff_8_wins, record['driver_name'])
+                    penalties: PenaltyIndex):
+    for record in penalties.for_race(season, current_race):
+        if record.type == 'season_points':
+            season_points[record.driver_name] -= record.amount
+        elif record.type == 'playoff_points':
+            playoff_points[record.driver_name] -= record.amount
+        elif record.type == 'race_win':
+            if current_race <= 26:
+                season_wins[record.driver_name] = season_wins.get(record.driver_name, 0) - 1
+                season_wins = delete_loser(season_wins, record.driver_name)
+            elif current_race <= 29:
+                playoff_16_wins[record.driver_name] = playoff_16_wins.get(record.driver_name, 0) - 1
+                playoff_16_wins = delete_loser(playoff_16_wins, record.driver_name)
+            elif current_race <= 32:
+                playoff_12_wins[record.driver_name] = playoff_12_wins.get(record.driver_name, 0) - 1
+                playoff_12_wins = delete_loser(playoff_12_wins, record.driver_name)
+            elif current_race <= 35:
+                playoff_8_wins[record.driver_name] = playoff_8_wins.get(record.driver_name, 0) - 1
+                playoff_8_wins = delete_loser(playoff_8_wins, record.driver_name)
     return season_points, playoff_points, season_wins, playoff_16_wins, playoff_12_wins, playoff_8_wins
 
 def delete_loser(wins_dist, driver):
     if wins_dist[driver] == 0:
         del wins_dist[driver]
     return wins_dist
+
+
+def cumulative_by_race(values: np.ndarray) -> np.ndarray:
+    return np.hstack([np.zeros((values.shape[0], 1), dtype=values.dtype), values.cumsum(axis=1)])
@@ -0,0 +1,131 @@
+import json
+import os
+import re
+
+import pandas as pd
+
+import data_processing
+from data_store import SNAPSHOT_TABLE, DataStore, data_store, write_season_partition
+from penalties import first_changed_race, penalties_driver, penalties_team, penalties_version
+
+
+SNAPSHOT_SOURCES = ('standings', 'race_results')
+# Columns mixing ints with labels ('-', '+12', 'Locked In'), stored as strings
+MIXED_COLUMNS = ('best_position',
+                 'n_best_positions',
+                 'point_gap_to_bubble',
+                 'car_best_position',
+                 'car_n_best_positions')
+INTEGER_PATTERN = re.compile(r'-?\d+')
+
+
+class StandingsSnapshots:
+    def __init__(self, load_raw_data, standings_engine: str = 'pandas', store: DataStore = data_store):
+        self.load_raw_data = load_raw_data
+        self.standings_engine = standings_engine
+        self.store = store
+        return
+
+    def get(self, season_year: int, race_number: int) -> pd.DataFrame:
+        self.refresh(season_year)
+        snapshot = self.store.race_view(SNAPSHOT_TABLE, int(season_year), int(race_number))
+        if snapshot.empty:
+            return None
+        return decode_snapshot(snapshot)
+
+    def season(self, season_year: int, last_race_number: int):
+        self.refresh(season_year)
+        for race_number in range(1, int(last_race_number) + 1):
+            snapshot = self.store.race_view(SNAPSHOT_TABLE, int(season_year), race_number)
+            if snapshot.empty:
+                return
+            yield decode_snapshot(snapshot)
+        return
+
+    def refresh(self, season_year: int) -> bool:
+        sources = read_sources(self.store.data_dir)
+        entry = sources.get(str(season_year), {})
+        source_version = self.source_version(season_year)
+        season_penalties = {'driver': penalties_driver.season_records(int(season_year)),
+                            'team': penalties_team.season_records(int(season_year))}
+        first_race_number = 1
+        if entry.get('sources') == source_version:
+            if entry['penalties_version'] == penalties_version:
+                return False
+            # Only the penalty file moved on, snapshots before the first changed race stay valid
+            changed_races = [first_changed_race(entry['penalties'][kind], season_penalties[kind]) for kind in season_penalties]
+            changed_races = [race for race in changed_races if race is not None]
+            first_race_number = min(changed_races) if changed_races else None
+
+        if first_race_number is not None:
+            self._rebuild(season_year, first_race_number)
+        sources[str(season_year)] = {'sources': source_version,
+                                     'penalties_version': penalties_version,
+                                     'penalties': season_penalties}
+        write_sources(sources, self.store.data_dir)
+        return first_race_number is not None
+
+    def source_version(self, season_year: int) -> str:
+        return ':'.join(str(self.store.version(name, season_year)) for name in SNAPSHOT_SOURCES)
+
+    def _rebuild(self, season_year: int, first_race_number: int) -> None:
+        # Season totals in a snapshot depend on the whole season, so a new race
+        # recomputes every race of that season
+        raw_standings_data = self.load_raw_data(season_year)
+        last_race_number = max([int(res['race_number']) for res in raw_standings_data] + [0])
+        snapshots = [encode_snapshot(snapshot) for snapshot in data_processing.compose_playoff_standings_snapshots(
+            raw_standings_data, last_race_number, season_year, self.standings_engine, first_race_number)]
+        if first_race_number > 1:
+            stored = self.store.season_view(SNAPSHOT_TABLE, int(season_year))
+            snapshots.insert(0, stored[stored['race_number'] < first_race_number])
+        if snapshots:
+            write_season_partition(pd.concat(snapshots, ignore_index=True),
+                                   SNAPSHOT_TABLE,
+                                   season_year,
+                                   self.store.data_dir)
+        return
+
+
+def encode_snapshot(frame: pd.DataFrame) -> pd.DataFrame:
+    frame = frame.reindex(columns=list(dict.fromkeys(list(frame.columns) + list(MIXED_COLUMNS))))
+    for col in MIXED_COLUMNS:
+        # Parquet string columns are written without nulls, '' marks a column a race does not have
+        frame[col] = ['' if pd.isna(value) else str(value) for value in frame[col]]
+    return frame
+
+
+def decode_snapshot(frame: pd.DataFrame) -> pd.DataFrame:
+    frame = frame.reset_index(drop=True)
+    for col in MIXED_COLUMNS:
+        if (frame[col] == '').all():
+            frame = frame.drop(columns=col)
+            continue
+        values = [int(value) if INTEGER_PATTERN.fullmatch(value) else value for value in frame[col]]
+        if all(isinstance(value, int) for value in values):
+            frame[col] = pd.Series(values, dtype='int64')
+        else:
+            frame[col] = pd.Series(values, dtype='object')
+    frame['season_year'] = frame['season_year'].astype('int64')
+    return frame
+
+
+def sources_path(data_dir: str = 'data') -> str:
+    return os.path.join(data_dir, SNAPSHOT_TABLE, '_sources.json')
+
+
+def read_sources(data_dir: str = 'data') -> dict:
+    path = sources_path(data_dir)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def write_sources(sources: dict, data_dir: str = 'data') -> None:
+    path = sources_path(data_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(sources, file, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+    return
@@ -0,0 +1,67 @@
+import json
+import os
+
+import pandas as pd
+
+from data_store import CSV_DTYPES
+from json_exports import EXPORT_DIR
+from process_data import STAGE_POINTS_COLUMNS
+
+
+# Same entity columns as getRacerTypeCol in statsCalculations.jsx
+ENTITY_COLUMNS = {'driver': 'driver_name', 'team': 'team_name', 'manufacturer': 'manufacturer'}
+AGGREGATE_SOURCES = ('race_results', 'standings', 'loop_data')
+NOT_FEATURES = ('season_year', 'race_number', 'car_number')
+# Track groups the statistics track filter offers, keyed by type name
+TRACK_TYPES_PATH = os.path.join(EXPORT_DIR, 'track_types.json')
+# Rollup label for "any track type"
+ALL = 'all'
+GROUP_COLUMNS = ['entity_type', 'entity', 'season_year', 'track_type']
+
+
+def aggregate_features(df: pd.DataFrame) -> list:
+    features = [col for source in AGGREGATE_SOURCES for col in CSV_DTYPES[source]] + list(STAGE_POINTS_COLUMNS.values())
+    return [col for col in dict.fromkeys(features)
+            if col in df and col not in NOT_FEATURES and pd.api.types.is_numeric_dtype(df[col])]
+
+
+def read_track_types(path: str = TRACK_TYPES_PATH) -> dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+# One row per (entity_type, entity, season_year, track_type) with n_races and a <feature>_sum per feature,
+# track_type also comes rolled up as 'all'. Means are left to the reader as sum / n_races, the way getAvgValue
+# averages over every row of the entity, so they also add up across seasons. Nothing reads a season_stage
+# split yet, so it is not exported
+def compose_entity_aggregates(df: pd.DataFrame, track_types: dict) -> pd.DataFrame:
+    features = aggregate_features(df)
+    track_to_type = {track: track_type for track_type, tracks in track_types.items() for track in tracks}
+    keys = pd.DataFrame({'season_year': df['season_year'].values,
+                         'track_type': df['track_name'].map(track_to_type).fillna(ALL).values})
+    values = df[features].astype('float64').reset_index(drop=True)
+    values['n_races'] = 1
+
+    tables = []
+    for entity_type, entity_col in ENTITY_COLUMNS.items():
+        base = pd.concat([keys, values], axis=1)
+        base.insert(0, 'entity', df[entity_col].astype('object').values)
+        # Sums and counts are additive, the 'all' rollup regroups the small base table instead of the rows
+        base = base.groupby(GROUP_COLUMNS[1:], sort=False).sum().reset_index()
+        table = pd.concat([base[base['track_type'] != ALL], base.assign(track_type=ALL)], ignore_index=True)
+        table = table.groupby(GROUP_COLUMNS[1:], sort=True).sum().reset_index()
+        table.insert(0, 'entity_type', entity_type)
+        tables.append(table)
+
+    table = pd.concat(tables, ignore_index=True)
+    sums = table[features].values
+    columns = {col: table[col].values for col in GROUP_COLUMNS}
+    columns['n_races'] = table['n_races'].values.astype('int64')
+    for i, feature in enumerate(features):
+        columns[f'{feature}_sum'] = sums[:, i]
+    table = pd.DataFrame(columns)
+    # Integer features keep integer sums so they read the same as the client-side reduce
+    for feature in features:
+        if pd.api.types.is_integer_dtype(df[feature]):
+            table[f'{feature}_sum'] = table[f'{feature}_sum'].astype('int64')
+    return table
@@ -0,0 +1,37 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_store import CSV_DTYPES, append_race_csv, read_parquet_table, write_season_partition
+
+
+def make_race_results() -> pd.DataFrame:
+    frame = pd.DataFrame({
+        'driver_name': ['Joey Logano', 'Tyler Reddick', 'Ryan Blaney'],
+        'car_number': [22, 45, 12],
+        'team_name': ['Team Penske', '23XI Racing', np.nan],
+        'manufacturer': [np.nan, 'Toyota', 'Ford'],
+        'season_year': [2024, 2024, 2024],
+        'race_number': [1, 1, 1],
+        'status': ['running', np.nan, 'running'],
+    })
+    for col, dtype in CSV_DTYPES['race_results'].items():
+        if col not in frame:
+            frame[col] = 0
+    return frame[list(CSV_DTYPES['race_results'])].astype(CSV_DTYPES['race_results'])
+
+
+# Empty scraped cells have to read back the same from both storages
+def test_parquet_nulls_round_trip_like_csv(tmp_path):
+    frame = make_race_results()
+    write_season_partition(frame, 'race_results', 2024, str(tmp_path))
+    append_race_csv(frame, 'race_results', str(tmp_path))
+
+    from_parquet = read_parquet_table('race_results', data_dir=str(tmp_path))
+    from_csv = pd.read_csv(os.path.join(tmp_path, 'race_results.csv'), dtype=CSV_DTYPES['race_results'])
+
+    for col in ('team_name', 'manufacturer', 'status'):
+        assert from_parquet[col].isna().tolist() == frame[col].isna().tolist()
+        assert 'nan' not in from_parquet[col].dropna().tolist()
+    pd.testing.assert_frame_equal(from_parquet, from_csv, check_categorical=False)
@@ -0,0 +1,93 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+import data_processing
+from data_store import SNAPSHOT_TABLE, DataStore, read_parquet_table, write_season_partition
+from standings_snapshots import decode_snapshot, encode_snapshot
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scrapper'))
+from db_connectors import DBReader, DBWriter
+
+
+# Every engine replays the tracked seasons and has to give the same snapshot for every race
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+store = DataStore(DATA_DIR)
+SEASONS = sorted(int(season_year) for season_year in store.load('standings')['season_year'].unique())
+
+
+# Same rows as DataProcessor._load_raw_standings_data
+def load_raw_standings_data(season_year: int) -> list:
+    standings = store.load('standings', seasons=[season_year])
+    race_res = store.load('race_results',
+                          seasons=[season_year],
+                          columns=['driver_name', 'season_year', 'race_number', 'race_pos'])
+    raw_data = standings.merge(race_res, on=['driver_name', 'season_year', 'race_number']).reset_index(drop=True)
+    raw_data['season_year'] = int(season_year)
+    return raw_data.to_dict(orient='records')
+
+
+def replay_season(season_year: int, engine: str) -> list:
+    raw_standings_data = load_raw_standings_data(season_year)
+    last_race_number = max(int(res['race_number']) for res in raw_standings_data)
+    return list(data_processing.compose_playoff_standings_snapshots(raw_standings_data, last_race_number, season_year, engine))
+
+
+# Frames built from engine output and from SQL rows differ in dtypes only, compare what the exports see
+def as_records(frame: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame(frame.to_dict(orient='records'))
+
+
+def assert_same_snapshot(expected: pd.DataFrame, actual: pd.DataFrame) -> None:
+    pd.testing.assert_frame_equal(as_records(expected), as_records(actual))
+    assert expected.to_json(orient='records') == actual.to_json(orient='records')
+    return
+
+
+@pytest.fixture(scope='module')
+def pandas_snapshots() -> dict:
+    return {season_year: replay_season(season_year, 'pandas') for season_year in SEASONS}
+
+
+@pytest.fixture(scope='module')
+def db_reader() -> DBReader:
+    engine = create_engine('sqlite://', poolclass=StaticPool)
+    writer = DBWriter(engine)
+    race_results = store.load('race_results')
+    race_results['car_number'] = race_results['car_number'].astype(str)
+    writer.write_rows({'nascar_race_results': race_results.astype(object).to_dict(orient='records'),
+                       'nascar_standings': store.load('standings').to_dict(orient='records')})
+    return DBReader(engine)
+
+
+@pytest.mark.parametrize('season_year', SEASONS)
+def test_numpy_engine_matches_pandas(season_year, pandas_snapshots):
+    numpy_snapshots = replay_season(season_year, 'numpy')
+    assert len(numpy_snapshots) == len(pandas_snapshots[season_year])
+    for expected, actual in zip(pandas_snapshots[season_year], numpy_snapshots):
+        assert_same_snapshot(expected, actual)
+
+
+@pytest.mark.parametrize('season_year', SEASONS)
+def test_sql_totals_match_pandas(season_year, pandas_snapshots, db_reader):
+    for race_number, expected in enumerate(pandas_snapshots[season_year], start=1):
+        totals = db_reader.get_standings_totals(season_year, race_number)
+        race_winners = db_reader.get_race_winners(season_year, race_number)
+        actual = data_processing.compose_playoff_standings_from_totals(totals, race_winners, race_number, season_year)
+        assert_same_snapshot(expected, actual)
+
+
+@pytest.mark.parametrize('season_year', SEASONS)
+def test_parquet_snapshots_round_trip(season_year, pandas_snapshots, tmp_path):
+    snapshots = pandas_snapshots[season_year]
+    write_season_partition(pd.concat([encode_snapshot(snapshot) for snapshot in snapshots], ignore_index=True),
+                           SNAPSHOT_TABLE,
+                           season_year,
+                           str(tmp_path))
+    stored = read_parquet_table(SNAPSHOT_TABLE, data_dir=str(tmp_path))
+    for race_number, expected in enumerate(snapshots, start=1):
+        assert_same_snapshot(expected, decode_snapshot(stored[stored['race_number'] == race_number]))
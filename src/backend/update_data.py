@@ -1,38 +1,71 @@
 import pandas as pd
 from typing import Tuple, Any
-import json
 
 import data_processing
+from data_store import data_store
 from process_data import FeatureProcessor
+from standings_snapshots import StandingsSnapshots
 from entry_list import drivers_2025
+from json_exports import JsonExporter, RecordsStreamWriter
+from export_planner import ExportPlanner, write_json_if_changed
+from stats_aggregates import compose_entity_aggregates, read_track_types
 
 
 class DataProcessor:
+    def __init__(self, standings_engine: str = 'pandas'):
+        self.standings_engine = standings_engine
+        self.snapshots = StandingsSnapshots(self._load_raw_standings_data, standings_engine)
+        return
+
     def update_data(self):
         df, (next_race_data, last_race_data) = self.get_stats()
         # with open('data/next_race_data.json', 'w') as file:
         #     json.dump(next_race_data, file)
-        with open('../../public/data/next_race_data.json', 'w') as file:
-            json.dump(next_race_data, file)
-        with open('../../public/data/last_race_data.json', 'w') as file:
-            json.dump(last_race_data, file)
+        write_json_if_changed('../../public/data/next_race_data.json', next_race_data)
+        write_json_if_changed('../../public/data/last_race_data.json', last_race_data)
+        exporter = JsonExporter()
+        planner = ExportPlanner()
+        track_types = read_track_types()
         for season_year in range(2024, int(last_race_data['last_race_season']) + 1):
-            season_standings = pd.DataFrame()
-            for race_number in range(1, 37):
-                if (season_year == int(last_race_data['last_race_season'])) & (race_number > int(last_race_data['last_race_number'])):
-                    break
-                current_standings = pd.DataFrame(self.get_standings(season_year, race_number))
-                season_standings = pd.concat([season_standings, current_standings])
+            # Seasons whose sources, penalties and last race did not change keep their exports
+            fingerprint = planner.season_fingerprint(season_year, last_race_data)
+            if not planner.is_stale(f'season_{season_year}', fingerprint, [f'../../public/data/standings_{season_year}.json',
+                                                                          f'../../public/data/data_{season_year}.json',
+                                                                          f'../../public/data/aggregates_{season_year}.columnar.json']):
+                continue
+            last_race_number = 36
+            if season_year == int(last_race_data['last_race_season']):
+                last_race_number = int(last_race_data['last_race_number'])
             car_numbers = df[df['season_year'] == season_year][['driver_name', 'car_number']].drop_duplicates()
-            season_standings = season_standings.merge(car_numbers, on='driver_name')
-            season_standings = season_standings.merge(df[['season_year', 'race_number', 'race_date']].drop_duplicates(), on=['season_year', 'race_number'])
-            season_standings.to_json(f'../../public/data/standings_{season_year}.json', orient='records')
-            fantasy_group_standings = season_standings[
-                (season_standings['season_year'] == int(last_race_data['last_race_season'])) &
-                (season_standings['race_number'] == int(last_race_data['last_race_number']))]
+            race_dates = df[['season_year', 'race_number', 'race_date']].drop_duplicates()
+            # Each race is written out as soon as its snapshot is ready, the season frame is never built
+            standings_writer = RecordsStreamWriter(f'../../public/data/standings_{season_year}.json')
+            standings_stream = exporter.season_stream(f'standings_{season_year}')
+            standings_columns = None
+            fantasy_group_standings = None
+            for current_standings in self.get_season_standings(season_year, last_race_number):
+                race_standings = pd.DataFrame(current_standings)
+                race_standings = race_standings.merge(car_numbers, on='driver_name')
+                race_standings = race_standings.merge(race_dates, on=['season_year', 'race_number'])
+                # The final race has no bubble gap, keep the first race's column layout for every row
+                standings_columns = standings_columns or list(race_standings.columns)
+                race_standings = race_standings.reindex(columns=standings_columns)
+                standings_writer.write(race_standings)
+                standings_stream.write(race_standings)
+                is_last_race = ((race_standings['season_year'] == int(last_race_data['last_race_season'])) &
+                                (race_standings['race_number'] == int(last_race_data['last_race_number'])))
+                if fantasy_group_standings is None or is_last_race.any():
+                    fantasy_group_standings = race_standings[is_last_race]
+            standings_writer.close()
+            standings_stream.close()
             groups = self.make_fantasy_groups(fantasy_group_standings)
             season_df = df[df['season_year'] == season_year].merge(groups, on='driver_name', how='left')
             season_df.to_json(f'../../public/data/data_{season_year}.json', orient='records')
+            exporter.export_season(season_df, f'data_{season_year}')
+            # Per driver/team/manufacturer sums and means, read by key in statsCalculations.jsx
+            exporter.export_season(compose_entity_aggregates(season_df, track_types), f'aggregates_{season_year}')
+            exporter.save_manifest()
+            planner.mark_done(f'season_{season_year}', fingerprint)
         return
 
     def get_stats(self) -> Tuple[pd.DataFrame, Tuple[Any]]:
@@ -43,10 +76,38 @@ class DataProcessor:
         return df, (next_race_data, last_race_data)
 
     def get_standings(self, season_year: int, race_number: int) -> pd.DataFrame:
-        raw_data = pd.read_csv('data/standings.csv')
-        race_res = pd.read_csv('data/race_results.csv', usecols=['driver_name', 'season_year', 'race_number', 'race_pos'])
-        raw_data = raw_data.merge(race_res, on=['driver_name', 'season_year', 'race_number'])
-        raw_data = raw_data[raw_data['season_year'] == season_year].reset_index(drop=True)
+        season_standings_data = self.snapshots.get(season_year, race_number)
+        if season_standings_data is None:
+            raw_standings_data = self._load_raw_standings_data(season_year)
+            season_standings_data = data_processing.compose_playoff_standings_data(raw_standings_data,
+                                                                                    race_number,
+                                                                                    season_year,
+                                                                                    self.standings_engine)
+        return season_standings_data.to_dict(orient='records')
+
+    def get_season_standings(self, season_year: int, last_race_number: int):
+        stored_races = 0
+        for season_standings_data in self.snapshots.season(season_year, last_race_number):
+            stored_races += 1
+            yield season_standings_data.to_dict(orient='records')
+        if stored_races == int(last_race_number):
+            return
+        # Races past the last ingested one are not materialized
+        raw_standings_data = self._load_raw_standings_data(season_year)
+        for race_number, season_standings_data in enumerate(
+                data_processing.compose_playoff_standings_snapshots(raw_standings_data,
+                                                                    last_race_number,
+                                                                    season_year,
+                                                                    self.standings_engine), start=1):
+            if race_number > stored_races:
+                yield season_standings_data.to_dict(orient='records')
+
+    def _load_raw_standings_data(self, season_year: int) -> list:
+        raw_data = data_store.load('standings', seasons=[season_year])
+        race_res = data_store.load('race_results',
+                                   seasons=[season_year],
+                                   columns=['driver_name', 'season_year', 'race_number', 'race_pos'])
+        raw_data = raw_data.merge(race_res, on=['driver_name', 'season_year', 'race_number']).reset_index(drop=True)
         raw_standings_data = []
         for result in raw_data.iterrows():
             current_row = {
@@ -62,10 +123,7 @@ class DataProcessor:
                         "race_pos": result[1]['race_pos'],
                      }
             raw_standings_data.append(current_row)
-        season_standings_data = data_processing.compose_playoff_standings_data(raw_standings_data,
-                                                                                race_number,
-                                                                                season_year)
-        return season_standings_data.to_dict(orient='records')
+        return raw_standings_data
     
     def make_fantasy_groups(self, standings: pd.DataFrame) -> pd.DataFrame:
         standings = standings[standings['driver_name'].isin(drivers_2025)].reset_index(drop=True)
@@ -1,4 +1,4 @@
-import React, { useState } from "react";
+import React, { useState, useMemo } from "react";
 import {
     Paper, Box, ToggleButtonGroup, ToggleButton, FormControl, InputLabel, Select, MenuItem, ListSubheader
   } from "@mui/material";
@@ -8,6 +8,7 @@ import PointsStatTable from "./PointsStatTable";
 import PositionStatTable from "./PositionStatTable";
 import FightStatTable from "./FightStatTable";
 import TeamStatsComparison from "./DriverVsTeam";
+import { makeAggregateView } from "../../utils/statsCalculations";
 
 
 const trackTypes = loadJsonData("track_types.json");
@@ -19,7 +20,8 @@ const DetailedStats = ({ seasonYear, showAllYears, themeMode, onDriverClick }) =
 
     const isDark = themeMode["themeMode"] === "dark";
 
-    const rawData = getManySeasonData("race", 2022);
+    const rawData = useMemo(() => getManySeasonData("race", 2022), []);
+    const aggregateRows = useMemo(() => getManySeasonData("aggregates", 2022), []);
 
     const filterDataByTrack = (data) => {
         if (trackFilter === "all") return data;
@@ -44,6 +46,18 @@ const DetailedStats = ({ seasonYear, showAllYears, themeMode, onDriverClick }) =
         ? [] 
         : filterDataByTrack(rawData.filter(r => r.season_year === seasonYear));
 
+    // Exported aggregates cover all tracks and track types, single tracks still filter the rows
+    const seasons = showAllYears ? [...new Set(rawData.map(r => r.season_year))] : [seasonYear];
+    const aggregateTrackType = trackFilter === "all" ? "all" : trackFilter.startsWith("type_") ? trackFilter.replace("type_", "") : null;
+    const aggregates = useMemo(() => {
+        if (aggregateTrackType === null) return null;
+        return makeAggregateView(aggregateRows, seasons, aggregateTrackType);
+    }, [aggregateRows, aggregateTrackType, seasons.join()]);
+    const prevAggregates = useMemo(() => {
+        if (aggregateTrackType === null || showAllYears) return null;
+        return makeAggregateView(aggregateRows, [seasonYear - 1], aggregateTrackType);
+    }, [aggregateRows, aggregateTrackType, showAllYears, seasonYear]);
+
     const uniqueTracks = [...new Set(rawData.map(r => r.track_name))];
     const trackTypeEntries = Object.entries(trackTypes);
 
@@ -125,6 +139,8 @@ const DetailedStats = ({ seasonYear, showAllYears, themeMode, onDriverClick }) =
                     raceData={raceData}
                     seasonYear={seasonYear}
                     prevSeasonData={prevSeasonData}
+                    aggregates={aggregates}
+                    prevAggregates={prevAggregates}
                     isDark={isDark}  
                 />                 
             }
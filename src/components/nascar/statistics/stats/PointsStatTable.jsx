@@ -3,7 +3,10 @@ import {
   Table, TableBody, TableContainer, TableHead, TableRow, TableCell,
   Box, Typography, IconButton, Collapse 
 } from "@mui/material";
-import { getAvgValue, compareSumToPrevSeason, getStagePointsPercentage, getEntities, getSumValue } from "../../utils/statsCalculations";
+import {
+  getAvgValue, compareSumToPrevSeason, getStagePointsPercentage, getEntities, getSumValue,
+  getAggAvgValue, getAggSumValue, getAggStagePointsPercentage, getAggEntities, getAggCompareSumToPrevSeason
+} from "../../utils/statsCalculations";
 import KeyboardArrowDownIcon from '@mui/icons-material/KeyboardArrowDown';
 import KeyboardArrowUpIcon from '@mui/icons-material/KeyboardArrowUp';
 import { loadJsonData } from "../../utils/dataLoader";
@@ -159,7 +162,7 @@ const getCurrentSeasonRaceCount = (data, year) => {
   return data.filter(r => r.season_year === year).length;
 };
 
-const PointsStatTable = ({racerType, lastRaceData, raceData, seasonYear, prevSeasonData, isDark}) => {
+const PointsStatTable = ({racerType, lastRaceData, raceData, seasonYear, prevSeasonData, aggregates, prevAggregates, isDark}) => {
   const [sortKey, setSortKey] = useState("season_points");
   const [sortDirection, setSortDirection] = useState("desc");
   const [expandedRow, setExpandedRow] = useState(null);
@@ -173,7 +176,25 @@ const PointsStatTable = ({racerType, lastRaceData, raceData, seasonYear, prevSea
     }
   };
 
-  const rawEntities = getEntities(raceData, racerType, seasonYear, "season_points", false);
+  // Totals come from the exported aggregates when they cover the current filter
+  const sumValue = (entity, feature) => aggregates
+    ? getAggSumValue(aggregates, entity, feature, racerType)
+    : getSumValue(raceData, entity, feature, racerType);
+  const avgValue = (entity, feature) => aggregates
+    ? getAggAvgValue(aggregates, entity, feature, racerType)
+    : getAvgValue(raceData, entity, feature, racerType);
+  const stagePointsPercentage = (entity) => aggregates
+    ? getAggStagePointsPercentage(aggregates, entity, racerType)
+    : getStagePointsPercentage(raceData, entity, racerType);
+  // Whole previous season, the aggregates have no per race split
+  const diffToPrevSeason = (entity) => aggregates && prevAggregates
+    ? getAggCompareSumToPrevSeason(aggregates, prevAggregates, entity, "season_points", racerType)
+    : compareSumToPrevSeason(raceData, prevSeasonData, entity, "season_points", racerType);
+
+  const rawEntities = useMemo(() => aggregates
+    ? getAggEntities(aggregates, racerType, seasonYear, "season_points", false)
+    : getEntities(raceData, racerType, seasonYear, "season_points", false),
+  [aggregates, raceData, racerType, seasonYear]);
 
   // Move getValue outside of useMemo
   const getValue = (entity) => {
@@ -182,14 +203,15 @@ const PointsStatTable = ({racerType, lastRaceData, raceData, seasonYear, prevSea
       sortKey === "race_playoff_points" ||
       sortKey === "race_stage_points"
     ) {
-      return getSumValue(raceData, entity, sortKey, racerType);
+      return sumValue(entity, sortKey);
     } else if (sortKey === "stage_points_pct") {
-      return getStagePointsPercentage(raceData, entity, racerType);
+      return stagePointsPercentage(entity);
     } else if (sortKey === "finish_pos_pct") {
-      return 100 - getStagePointsPercentage(raceData, entity, racerType);
+      return 100 - stagePointsPercentage(entity);
     } else if (sortKey === "avg_season_points") {
-      return getAvgValue(raceData, entity, "season_points", racerType);
+      return avgValue(entity, "season_points");
     } else if (sortKey === "diff_to_prev") {
+      if (aggregates && prevAggregates) return diffToPrevSeason(entity);
       // Get the number of races completed in current season
       const currentSeasonRaces = getCurrentSeasonRaceCount(raceData, seasonYear);
       
@@ -221,7 +243,7 @@ const PointsStatTable = ({racerType, lastRaceData, raceData, seasonYear, prevSea
       const valB = getValue(b);
       return sortDirection === "asc" ? valA - valB : valB - valA;
     });
-  }, [rawEntities, sortKey, sortDirection, raceData, racerType, prevSeasonData, seasonYear]);
+  }, [rawEntities, sortKey, sortDirection, raceData, racerType, prevSeasonData, seasonYear, aggregates, prevAggregates]);
 
   const applyZebraTint = (colorEven, colorOdd, index) =>
     index % 2 === 0 ? colorEven : colorOdd;
@@ -325,14 +347,14 @@ const PointsStatTable = ({racerType, lastRaceData, raceData, seasonYear, prevSea
                   </TableCell>
                 )}
                 {racerType !== "driver" && <TableCell sx={{...cellStyle, textAlign: 'left'}}>{entity}</TableCell>}
-                <TableCell sx={cellStyle}>{getSumValue(raceData, entity, "season_points", racerType)}</TableCell>
-                <TableCell sx={cellStyle}>{getSumValue(raceData, entity, "race_playoff_points", racerType)}</TableCell>
-                <TableCell sx={cellStyle}>{getSumValue(raceData, entity, "race_stage_points", racerType)}</TableCell>
-                <TableCell sx={cellStyle}>{getStagePointsPercentage(raceData, entity, racerType)}%</TableCell>
-                <TableCell sx={cellStyle}>{100 - getStagePointsPercentage(raceData, entity, racerType)}%</TableCell>
-                <TableCell sx={cellStyle}>{getAvgValue(raceData, entity, "season_points", racerType)}</TableCell>
+                <TableCell sx={cellStyle}>{sumValue(entity, "season_points")}</TableCell>
+                <TableCell sx={cellStyle}>{sumValue(entity, "race_playoff_points")}</TableCell>
+                <TableCell sx={cellStyle}>{sumValue(entity, "race_stage_points")}</TableCell>
+                <TableCell sx={cellStyle}>{stagePointsPercentage(entity)}%</TableCell>
+                <TableCell sx={cellStyle}>{100 - stagePointsPercentage(entity)}%</TableCell>
+                <TableCell sx={cellStyle}>{avgValue(entity, "season_points")}</TableCell>
                 <TableCell sx={cellStyle}>
-                  {compareSumToPrevSeason(raceData, prevSeasonData, entity, "season_points", racerType)}
+                  {diffToPrevSeason(entity)}
                 </TableCell>
               </TableRow>
               <TableRow>
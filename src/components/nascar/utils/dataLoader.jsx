@@ -6,7 +6,7 @@ export const getSeasonData = (dataType, season, raceNumber = 36) => {
           : (() => {
               throw new Error(`Unknown dataType: ${dataType}`);
             })();
-  const seasonData = loadJsonData(fileName).filter((race) => race.race_number <= raceNumber);
+  const seasonData = loadSeasonRecords(fileName).filter((race) => race.race_number <= raceNumber);
   return seasonData;
 };
 
@@ -20,12 +20,16 @@ export const getManySeasonData = (dataType, startYear) => {
       fileName = `standings_${year}.json`;
     } else if (dataType === "race") {
       fileName = `data_${year}.json`;
+    } else if (dataType === "aggregates") {
+      // Aggregates only exist as columnar exports, seasons without one are skipped without a request
+      fileName = `aggregates_${year}.columnar.json`;
+      if (!isExported(fileName)) continue;
     } else {
       throw new Error(`Unknown dataType: ${dataType}`);
     }
 
     try {
-      results.push(...loadJsonData(fileName));
+      results.push(...(dataType === "aggregates" ? loadColumnarRecords(fileName) : loadSeasonRecords(fileName)));
     } catch (e) {
       console.warn(`Skipping missing or failed file: ${fileName}`);
     }
@@ -42,7 +46,7 @@ export const getTrackData = (startYear, track, trackFilterType = 'exact') => {
   for (const year of seasonRange) {
     const fileName = `data_${year}.json`;
     try {
-      const seasonData = loadJsonData(fileName);
+      const seasonData = loadSeasonRecords(fileName);
       let filtered = seasonData;
       filtered = filtered.filter((race) => {
         const isExact = race.track_name === track;
@@ -62,6 +66,40 @@ export const getTrackData = (startYear, track, trackFilterType = 'exact') => {
 }  
 
 
+// Files written by json_exports.py, listed in its manifest.json and loaded once
+let exportManifest = null;
+const isExported = (filename) => {
+  if (exportManifest === null) {
+    try {
+      exportManifest = loadJsonData("manifest.json");
+    } catch (e) {
+      exportManifest = {};
+    }
+  }
+  return Object.prototype.hasOwnProperty.call(exportManifest, filename);
+};
+
+// Season exports come as one array per field (<name>.columnar.json), rows are rebuilt here;
+// seasons the manifest has no columnar file for read the row-per-record file straight away
+export const loadSeasonRecords = (filename) => {
+  const columnarFilename = filename.replace(/\.json$/, ".columnar.json");
+  if (!isExported(columnarFilename)) return loadJsonData(filename);
+  return loadColumnarRecords(columnarFilename);
+};
+
+export const loadColumnarRecords = (columnarFilename) => {
+  const { n_rows: nRows, columns, data } = loadJsonData(columnarFilename);
+  const rows = new Array(nRows);
+  for (let i = 0; i < nRows; i++) {
+    const row = {};
+    for (const column of columns) {
+      row[column] = data[column][i];
+    }
+    rows[i] = row;
+  }
+  return rows;
+};
+
 export const loadJsonData = (filename) => {
     const xhr = new XMLHttpRequest();
     xhr.open("GET", `/data/${filename}`, false);
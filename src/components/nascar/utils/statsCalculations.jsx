@@ -94,4 +94,75 @@ export const getEntities = (raceData, entityType, seasonYear, sortColumn, isAsc)
         const avgB = getAvgValue(raceData, b, sortColumn, entityType);
         return isAsc ? avgA - avgB : avgB - avgA;
     });
-};
\ No newline at end of file
+};
+
+
+
+// Per entity sums exported by stats_aggregates.py, one row per
+// (entity_type, entity, season_year, track_type) with an "all" track type rollup
+
+// entity_type -> entity -> rows of the given seasons and track type, null when one of the seasons
+// has no aggregate export and the callers have to scan the race rows instead
+export const makeAggregateView = (aggregateRows, seasons, trackType = "all") => {
+    const exportedSeasons = new Set(aggregateRows.map(row => row.season_year));
+    if (seasons.length === 0 || !seasons.every(season => exportedSeasons.has(season))) return null;
+    const selectedSeasons = new Set(seasons);
+    const view = new Map(Object.keys({ driver: 0, team: 0, manufacturer: 0 }).map(racerType => [racerType, new Map()]));
+    for (const row of aggregateRows) {
+        if (row.track_type !== trackType || !selectedSeasons.has(row.season_year)) continue;
+        const entities = view.get(row.entity_type);
+        if (!entities.has(row.entity)) entities.set(row.entity, []);
+        entities.get(row.entity).push(row);
+    }
+    return view;
+};
+
+const getAggregateTotal = (view, entity, feature, racerType) => {
+    const rows = view.get(racerType)?.get(entity) || [];
+    let total = 0;
+    let nRaces = 0;
+    for (const row of rows) {
+        total += row[`${feature}_sum`];
+        nRaces += row.n_races;
+    }
+    return [total, nRaces];
+};
+
+export const getAggAvgValue = (view, entity, feature, racerType) => {
+    const [total, nRaces] = getAggregateTotal(view, entity, feature, racerType);
+    if (nRaces === 0) return "-";
+    return (total / nRaces).toFixed(2);
+};
+
+export const getAggSumValue = (view, entity, feature, racerType) => {
+    const [total, nRaces] = getAggregateTotal(view, entity, feature, racerType);
+    if (nRaces === 0) return "-";
+    return total;
+};
+
+export const getAggStagePointsPercentage = (view, entity, racerType) => {
+    const [stagePoints, nRaces] = getAggregateTotal(view, entity, "race_stage_points", racerType);
+    if (nRaces === 0) return "-";
+    const [finishPoints] = getAggregateTotal(view, entity, "race_finish_points", racerType);
+    return (100 * stagePoints / (stagePoints + finishPoints)).toFixed(2);
+};
+
+export const getAggCompareSumToPrevSeason = (view, prevSeasonView, entity, feature, racerType) => {
+    const [currentSeasonSum, nRaces] = getAggregateTotal(view, entity, feature, racerType);
+    const [prevSeasonSum, prevSeasonRaces] = getAggregateTotal(prevSeasonView, entity, feature, racerType);
+    if (nRaces === 0 || prevSeasonRaces === 0) return "-";
+    if (prevSeasonSum === 0) return "-";
+    return (100 * (currentSeasonSum - prevSeasonSum) / prevSeasonSum).toFixed(2) + '%';
+};
+
+// Same entities and order as getEntities, taken from the view instead of the race rows
+export const getAggEntities = (view, entityType, seasonYear, sortColumn, isAsc) => {
+    let entities = [...view.get(entityType).keys()];
+    if (entityType === "driver" && seasonYear && entryList[seasonYear]) {
+        entities = entities.filter(name => entryList[seasonYear].includes(name));
+    } else if (entityType === "team") {
+        entities = entities.filter(name => name.toLowerCase() !== "unknown");
+    }
+    const averages = new Map(entities.map(entity => [entity, getAggAvgValue(view, entity, sortColumn, entityType)]));
+    return entities.sort((a, b) => isAsc ? averages.get(a) - averages.get(b) : averages.get(b) - averages.get(a));
+};
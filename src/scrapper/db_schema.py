@@ -0,0 +1,76 @@
+from sqlalchemy import Column, Date, Float, Index, Integer, MetaData, String, Table
+
+
+metadata = MetaData()
+
+track_data_table = Table(
+    'nascar_track_data', metadata,
+    Column('track_name', String(255), nullable=False, primary_key=True),
+    Column('track_short_name', String(255), nullable=False),
+    Column('track_type', String(255), nullable=False),
+    Column('track_type_short', String(255), nullable=False),
+    Column('track_length_mi', String(255), nullable=True),
+)
+
+calendar_table = Table(
+    'nascar_calendar', metadata,
+    Column('season_year', Integer, nullable=False, primary_key=True),
+    Column('race_number', Integer, nullable=False, primary_key=True),
+    Column('track_name', String(255), nullable=False),
+    Column('race_date', Date, nullable=False),
+    Column('season_stage', String(255), nullable=False),
+)
+
+race_data_table = Table(
+    'nascar_race_data', metadata,
+    Column('season_year', Integer, nullable=False, primary_key=True),
+    Column('race_number', Integer, nullable=False, primary_key=True),
+    Column('race_name', String(255), nullable=False),
+    Column('track_name', String(255), nullable=False),
+    Column('race_date', Date, nullable=False),
+    Column('cautions_number', Integer, nullable=False),
+    Column('green_flag_percent', Float, nullable=False),
+    Column('average_green_flag_run_laps', Float, nullable=False),
+    Column('number_of_leaders', Integer, nullable=False),
+    Column('average_leading_run_laps', Float, nullable=False),
+    Column('most_laps_led', Integer, nullable=False),
+    Column('most_laps_led_driver', String(255), nullable=False),
+    Column('most_laps_led_percent', Float, nullable=False),
+)
+
+race_results_table = Table(
+    'nascar_race_results', metadata,
+    Column('season_year', Integer, nullable=False, primary_key=True),
+    Column('race_number', Integer, nullable=False, primary_key=True),
+    Column('driver_name', String(255), nullable=False, primary_key=True),
+    Column('car_number', String(255), nullable=False),
+    Column('team_name', String(255), nullable=False),
+    Column('manufacturer', String(255), nullable=False),
+    Column('race_pos', Integer, nullable=False),
+    Column('quali_pos', Integer, nullable=False),
+    Column('stage_1_pos', Integer, nullable=False),
+    Column('stage_2_pos', Integer, nullable=False),
+    Column('stage_3_pos', Integer, nullable=False),
+    Column('laps_led', Integer, nullable=False),
+    Column('status', String(255), nullable=False),
+    Column('season_points', Integer, nullable=False),
+    Column('finish_position_points', Integer, nullable=False),
+    Column('stage_points', Integer, nullable=False),
+    Column('playoff_points', Integer, nullable=False),
+)
+
+standings_table = Table(
+    'nascar_standings', metadata,
+    Column('season_year', Integer, nullable=False, primary_key=True),
+    Column('race_number', Integer, nullable=False, primary_key=True),
+    Column('driver_name', String(255), nullable=False, primary_key=True),
+    Column('race_season_points', Integer, nullable=False),
+    Column('wins', Integer, nullable=False),
+    Column('stage_wins', Integer, nullable=False),
+    Column('race_playoff_points', Integer, nullable=False),
+    Column('race_finish_points', Integer, nullable=False),
+    Column('race_stage_points', Integer, nullable=False),
+    # The primary key already covers (season_year, race_number, driver_name) lookups,
+    # this one serves the per-driver running sums of a season
+    Index('ix_nascar_standings_season_driver_race', 'season_year', 'driver_name', 'race_number'),
+)
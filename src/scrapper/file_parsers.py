@@ -1,14 +1,49 @@
 from datetime import datetime
+import numpy as np
 import pandas as pd
 
-from nascar_dataclasses import NascarRaceDataObject, NascarStandingsObject, NascarRaceResultsObject
+from nascar_dataclasses import NascarRaceDataObject, NascarStandingsObject, NascarRaceResultsObject, ScrapedRaceObject
 from owners_to_teams import owners_to_teams
+from page_parser import (CAUTION_FLAGS_HEADERS, LAP_LEADERS_HEADERS, LOOP_DATA_HEADERS, RACE_INFO_HEADERS,
+                         RACE_RESULTS_HEADERS, TOP_10_HEADERS)
+
+
+TABLE_HEADERS = {
+    'race_info': RACE_INFO_HEADERS,
+    'race_results': RACE_RESULTS_HEADERS,
+    'top_10s': TOP_10_HEADERS,
+    'caution_flags': CAUTION_FLAGS_HEADERS,
+    'lap_leaders': LAP_LEADERS_HEADERS,
+    'loop_data': LOOP_DATA_HEADERS,
+}
+
+
+def load_race_table(season: int, race_number: int, name: str, scraped_race: ScrapedRaceObject = None) -> pd.DataFrame:
+    if scraped_race is None:
+        return pd.read_csv(f'data/{season}/{race_number}/{name}.csv')
+    return make_table_frame(getattr(scraped_race, name), TABLE_HEADERS[name], is_single_row=name == 'race_info')
+
+
+def make_table_frame(rows: list, headers: list, is_single_row: bool = False) -> pd.DataFrame:
+    # Same value types pd.read_csv infers from the per-race CSV files
+    if is_single_row:
+        rows = [rows]
+    rows = [[value if value != '' else np.nan for value in row[:len(headers)]] + [np.nan] * (len(headers) - len(row))
+            for row in rows]
+    frame = pd.DataFrame(rows, columns=headers, dtype=object)
+    for col in frame.columns:
+        try:
+            frame[col] = pd.to_numeric(frame[col])
+        except (ValueError, TypeError):
+            pass
+    return frame
 
 
 class NascarRaceDataParser:
-    def __init__(self, season: int, race_number: int):
+    def __init__(self, season: int, race_number: int, scraped_race: ScrapedRaceObject = None):
         self.season = season
         self.race_number = race_number
+        self.scraped_race = scraped_race
         return
 
     def fill_race_data(self) -> NascarRaceDataObject:
@@ -55,7 +90,7 @@ class NascarRaceDataParser:
         return race_data_row, csv_res
 
     def _load_track_data(self):
-        track_data = pd.read_csv(f'data/{self.season}/{self.race_number}/race_info.csv')
+        track_data = load_race_table(self.season, self.race_number, 'race_info', self.scraped_race)
         race_name = track_data['Name of the race'].values[0][5:]
         track_name = track_data['Location'].values[0].split(',')[0]
         raw_race_date = track_data['Date'].values[0]
@@ -63,7 +98,7 @@ class NascarRaceDataParser:
         return race_name, track_name, race_date
     
     def _load_caution_data(self):
-        caution_data = pd.read_csv(f'data/{self.season}/{self.race_number}/caution_flags.csv')
+        caution_data = load_race_table(self.season, self.race_number, 'caution_flags', self.scraped_race)
         cautions_number = caution_data[caution_data['Condition'] == 'yellow_flag']['# Of Laps'].count()
 
         n_green_laps = caution_data[caution_data['Condition'] == 'green_flag']['# Of Laps'].sum()
@@ -74,7 +109,7 @@ class NascarRaceDataParser:
         return cautions_number, green_flag_percent, average_green_flag_run_laps
 
     def _load_leaders_data(self):
-        leaders_data = pd.read_csv(f'data/{self.season}/{self.race_number}/lap_leaders.csv')
+        leaders_data = load_race_table(self.season, self.race_number, 'lap_leaders', self.scraped_race)
         number_of_leaders = leaders_data['Leader'].nunique()
         average_leading_run_laps = leaders_data['# Of Laps'].mean()
         leaders = leaders_data[['Leader', '# Of Laps']].groupby(
@@ -87,13 +122,14 @@ class NascarRaceDataParser:
 
 
 class NascarResultsParser:
-    def __init__(self, season: int, race_number: int):
+    def __init__(self, season: int, race_number: int, scraped_race: ScrapedRaceObject = None):
         self.season = season
         self.race_number = race_number
+        self.scraped_race = scraped_race
         return
 
     def fill_results_data(self):
-        results_data = pd.read_csv(f'data/{self.season}/{self.race_number}/race_results.csv')
+        results_data = load_race_table(self.season, self.race_number, 'race_results', self.scraped_race)
         stages_results = self._load_stage_data()
         results_data = results_data.merge(stages_results, on='#', how='left').fillna(0).sort_values('Pos', ascending=True)
         
@@ -201,7 +237,7 @@ class NascarResultsParser:
         return race_results, standings, csv_res, csv_standings
     
     def fill_loop_data(self):
-        results_data = pd.read_csv(f'data/{self.season}/{self.race_number}/loop_data.csv')
+        results_data = load_race_table(self.season, self.race_number, 'loop_data', self.scraped_race)
         
         driver_names = results_data['driver_name'].values
         start_poses = [int(number) for number in results_data['start_pos'].values]
@@ -252,7 +288,7 @@ class NascarResultsParser:
         return 'unknown'
 
     def _load_stage_data(self):
-        stage_data = pd.read_csv(f'data/{self.season}/{self.race_number}/top_10s.csv')
+        stage_data = load_race_table(self.season, self.race_number, 'top_10s', self.scraped_race)
         stage_1 = [int(number.strip('#')) for number in stage_data["Top 10 in Stage 1:"].values]
         stage_2 = [int(number.strip('#')) for number in stage_data["Top 10 in Stage 2:"].values]
         stage_3 = [int(number.strip('#')) if type(number) != float else 1000 for number in stage_data["Top 10 in Stage 3:"].tolist()]
@@ -59,4 +59,17 @@ class NascarCalendarObject:
     track_name: str
     race_date: date
     season_stage: str
-    
\ No newline at end of file
+    
+
+@dataclass(init=False)
+class ScrapedRaceObject:
+    season_year: int
+    race_number: int
+    race_info: list
+    race_results: list
+    top_10s: list
+    caution_flags: list
+    lap_leaders: list
+    points_standings: list
+    playoff_standings: list
+    loop_data: list
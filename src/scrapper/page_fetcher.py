@@ -0,0 +1,137 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from db_scrapper import make_chrome_driver
+
+
+HTML_CACHE_DIR = 'data/html_cache'
+# Statuses sites answer bots with, a real browser may still get the page
+BROWSER_FALLBACK_STATUSES = (403, 429)
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+
+class HtmlCache:
+    def __init__(self, cache_dir: str = HTML_CACHE_DIR):
+        self.cache_dir = cache_dir
+        return
+
+    def path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f'{key}.json.gz')
+
+    def get(self, url: str) -> dict:
+        path = self.path(url)
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            return json.load(file)
+
+    def put(self, url: str, html: str, etag: str = None, last_modified: str = None) -> None:
+        path = self.path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = os.path.join(os.path.dirname(path), f'.{os.path.basename(path)}.tmp')
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as file:
+            json.dump({'url': url, 'etag': etag, 'last_modified': last_modified, 'html': html}, file)
+        os.replace(tmp_path, path)
+        return
+
+
+class HttpFetcher:
+    def __init__(self,
+                 cache: HtmlCache = None,
+                 pool_size: int = 4,
+                 revalidate: bool = True,
+                 rate_limiter=None,
+                 timeout: float = 30.0):
+        self.cache = cache or HtmlCache()
+        self.revalidate = revalidate
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        return
+
+    def fetch(self, url: str) -> str:
+        cached = self.cache.get(url)
+        if cached is not None and not self.revalidate:
+            return cached['html']
+
+        headers = {}
+        if cached is not None:
+            if cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.wait(url)
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if cached is None:
+                raise
+            logging.warning(f"Could not revalidate {url}, using the cached page: {e}")
+            return cached['html']
+        if response.status_code == 304 and cached is not None:
+            return cached['html']
+        response.raise_for_status()
+        if 'charset' not in response.headers.get('Content-Type', ''):
+            response.encoding = response.apparent_encoding
+        self.cache.put(url, response.text, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return response.text
+
+    def close(self) -> None:
+        self.session.close()
+        return
+
+
+# Same get/page_source/quit surface as a Selenium driver; Chrome is only started if a fetch fails
+class HttpPageDriver:
+    def __init__(self, fetcher: HttpFetcher, make_fallback_driver=make_chrome_driver):
+        self.fetcher = fetcher
+        self.make_fallback_driver = make_fallback_driver
+        self.fallback_driver = None
+        self.page_source = ''
+        return
+
+    def get(self, url: str) -> None:
+        try:
+            self.page_source = self.fetcher.fetch(url)
+        except requests.RequestException as e:
+            # Missing pages and server errors are not retried in Chrome, and never cached
+            if not is_browser_fallback_error(e):
+                raise
+            logging.warning(f"HTTP fetch failed for {url}, falling back to browser: {e}")
+            self.page_source = self._browser_fetch(url)
+            self.fetcher.cache.put(url, self.page_source)
+        return
+
+    def quit(self) -> None:
+        if self.fallback_driver is not None:
+            self.fallback_driver.quit()
+            self.fallback_driver = None
+        return
+
+    def _browser_fetch(self, url: str) -> str:
+        if self.fallback_driver is None:
+            self.fallback_driver = self.make_fallback_driver()
+        if self.fetcher.rate_limiter is not None:
+            self.fetcher.rate_limiter.wait(url)
+        self.fallback_driver.get(url)
+        return self.fallback_driver.page_source
+
+
+def is_browser_fallback_error(error: requests.RequestException) -> bool:
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    return isinstance(error, requests.HTTPError) and error.response is not None and \
+        error.response.status_code in BROWSER_FALLBACK_STATUSES
@@ -0,0 +1,234 @@
+import logging
+import re
+import time
+
+from bs4 import BeautifulSoup
+
+
+PAGE_PARSERS = ('html.parser', 'lxml')
+
+RACE_INFO_HEADERS = ['Name of the race', 'Date', 'Location']
+RACE_RESULTS_HEADERS = ["Pos", "St", "#", "Driver", "Sponsor / Owner", "Car", "Laps", "Status", "Led", "Pts", "PPts"]
+TOP_10_HEADERS = ['Top 10 in Stage 1:', 'Top 10 in Stage 2:', 'Top 10 in Stage 3:']
+CAUTION_FLAGS_HEADERS = ["Condition", "From Lap", "To Lap", "# Of Laps", "Reason", "Free Pass"]
+LAP_LEADERS_HEADERS = ['Leader', 'From Lap', 'To Lap', '# Of Laps']
+POINTS_STANDINGS_HEADERS = ['Rank', 'Driver', 'Points', 'Diff']
+PLAYOFF_STANDINGS_HEADERS = ['Rank', 'Driver', 'Wins', 'Points']
+LOOP_DATA_HEADERS = ["driver_name",
+                     "start_pos",
+                     "mid_race_pos",
+                     "finish_pos",
+                     "highest_pos",
+                     "lowest_pos",
+                     "avg_pos",
+                     "pass_diff",
+                     "green_flag_passes",
+                     "green_flag_times_passed",
+                     "quality_passes",
+                     "pct_quality_passes",
+                     "fastest_lap",
+                     "top_15_laps",
+                     "pct_top_15_laps",
+                     "laps_led",
+                     "pct_laps_led",
+                     "total_laps",
+                     "driver_rating"]
+
+CAUTION_FLAGS_SECTION = 'Caution flag breakdown'
+LAP_LEADERS_SECTION = 'Lap leader breakdown:'
+POINTS_STANDINGS_SECTION = 'Points Standings after this race:'
+PLAYOFF_STANDINGS_SECTION = 'Playoff standings after this race:'
+
+
+class RacePage:
+    def __init__(self, html: str, parser: str = 'html.parser'):
+        if parser not in PAGE_PARSERS:
+            raise ValueError(f"Unknown page parser '{parser}', expected one of {PAGE_PARSERS}")
+        soup = BeautifulSoup(html, parser)
+        self.meta_info = soup.find(class_='raceMetaInfo')
+        self.race_number_tag = None
+        self.stage_tags = {}
+        self.results_table = None
+        self.loop_table = None
+        # Header text of the first "newhead" cell -> table, in document order
+        self.sections = {}
+
+        for tag in soup.find_all(['b', 'table']):
+            if tag.name == 'b':
+                if self.race_number_tag is None and 'race number' in tag.text:
+                    self.race_number_tag = tag
+                elif tag.string in TOP_10_HEADERS:
+                    self.stage_tags.setdefault(str(tag.string), tag)
+                continue
+
+            table_class = ' '.join(tag.get('class', []))
+            if self.results_table is None and table_class == 'tb race-results-tbl':
+                self.results_table = tag
+            if self.loop_table is None and table_class == 'tb loopData':
+                self.loop_table = tag
+            if 'tb' in tag.get('class', []):
+                header = tag.find('td', class_='newhead')
+                if header:
+                    self.sections.setdefault(header.text, tag)
+        return
+
+    def section(self, title: str):
+        for header, table in self.sections.items():
+            if title in header:
+                return table
+        return None
+
+
+def cell_text(cell) -> str:
+    return re.sub(r'\xa0', ' ', cell.text.strip())
+
+
+def extract_race_info(page: RacePage) -> list:
+    name_of_the_race = page.meta_info.find('h1').text.strip().replace('/', '').replace('  ', ' ')
+    date = ""
+    location = ""
+    if page.race_number_tag is not None:
+        date_tag = page.race_number_tag.find_next('a')
+        if date_tag:
+            date = date_tag.text.strip()
+            location_tag = date_tag.find_next('a')
+            if location_tag:
+                location = location_tag.text.strip()
+                location_sibling = location_tag.next_sibling
+                if location_sibling:
+                    location += location_sibling.strip()
+    return [name_of_the_race, date, location]
+
+
+def extract_race_results(page: RacePage) -> list:
+    if page.results_table is None:
+        logging.warning("Race results table not found")
+        return None
+    return [[cell_text(cell) for cell in row.find_all('td')] for row in page.results_table.find_all('tr')[1:]]
+
+
+def extract_top_10s(page: RacePage) -> list:
+    stages_info = []
+    for header in TOP_10_HEADERS:
+        stage_tag = page.stage_tags.get(header)
+        if stage_tag:
+            stages_info.append(stage_tag.next_sibling.strip().split(', '))
+        else:
+            logging.warning(f"{header.rstrip(':')} not found")
+            stages_info.append([])
+
+    stage1_info, stage2_info, stage3_info = stages_info
+    return [[stage1_info[i] if i < len(stage1_info) else '',
+             stage2_info[i] if i < len(stage2_info) else '',
+             stage3_info[i] if i < len(stage3_info) else '']
+            for i in range(max(len(stage1_info), len(stage2_info)))]
+
+
+def extract_caution_flags(page: RacePage) -> list:
+    caution_table = page.section(CAUTION_FLAGS_SECTION)
+    if caution_table is None:
+        logging.warning("Caution flag table not found")
+        return None
+    rows = []
+    for row in caution_table.find_all('tr')[2:]:
+        row_data = []
+        for cell in row.find_all('td'):
+            img = cell.find('img')
+            if img:
+                row_data.append(img['src'].split('/')[-1].split('.')[0])
+            else:
+                row_data.append(cell_text(cell))
+        rows.append(row_data)
+    return rows
+
+
+def extract_section_rows(page: RacePage, title: str) -> list:
+    table = page.section(title)
+    if table is None:
+        return None
+    return [[cell.text.strip() for cell in row.find_all('td')] for row in table.find_all('tr')[2:]]
+
+
+def extract_lap_leaders(page: RacePage) -> list:
+    return extract_section_rows(page, LAP_LEADERS_SECTION)
+
+
+def extract_points_standings(page: RacePage) -> list:
+    return extract_section_rows(page, POINTS_STANDINGS_SECTION)
+
+
+def extract_playoff_standings(page: RacePage) -> list:
+    return extract_section_rows(page, PLAYOFF_STANDINGS_SECTION)
+
+
+def extract_loop_data(page: RacePage) -> list:
+    if page.loop_table is None:
+        logging.warning("Loop data table not found")
+        return None
+    return [[cell_text(cell) for cell in row.find_all('td')] for row in page.loop_table.find_all('tr')[3:]]
+
+
+RACE_PAGE_SECTIONS = {
+    'race_results': extract_race_results,
+    'top_10s': extract_top_10s,
+    'caution_flags': extract_caution_flags,
+    'lap_leaders': extract_lap_leaders,
+    'points_standings': extract_points_standings,
+    'playoff_standings': extract_playoff_standings,
+}
+
+
+def parse_race_page(html: str, parser: str = 'html.parser') -> dict:
+    page = RacePage(html, parser)
+    try:
+        sections = {'race_info': extract_race_info(page)}
+    except AttributeError as e:
+        logging.error(f"Error extracting race information: {e}")
+        raise
+    for name, extractor in RACE_PAGE_SECTIONS.items():
+        try:
+            sections[name] = extractor(page)
+        except Exception as e:
+            logging.error(f"Error extracting {name.replace('_', ' ')}: {e}")
+            sections[name] = None
+    return sections
+
+
+def parse_loop_page(html: str, parser: str = 'html.parser') -> list:
+    try:
+        return extract_loop_data(RacePage(html, parser))
+    except Exception as e:
+        logging.error(f"Error extracting loop data: {e}")
+        return None
+
+
+def benchmark(pages: list, parser: str = 'html.parser', repeat: int = 3) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in pages:
+            parse_race_page(html, parser)
+        elapsed = (time.perf_counter() - start) / max(len(pages), 1)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == "__main__":
+    import gzip
+    import json
+    import os
+    import sys
+
+    from page_fetcher import HTML_CACHE_DIR
+
+    cache_dir = sys.argv[1] if len(sys.argv) > 1 else HTML_CACHE_DIR
+    race_pages = []
+    for root, _, files in os.walk(cache_dir):
+        for file_name in files:
+            if file_name.endswith('.json.gz'):
+                with gzip.open(os.path.join(root, file_name), 'rt', encoding='utf-8') as file:
+                    cached = json.load(file)
+                if '/race/' in cached['url']:
+                    race_pages.append(cached['html'])
+    for page_parser in PAGE_PARSERS:
+        print(f'{page_parser}: {benchmark(race_pages, page_parser) * 1000:.2f} ms per race page ({len(race_pages)} pages)')
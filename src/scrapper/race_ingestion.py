@@ -0,0 +1,66 @@
+import os
+import sys
+sys.path.append('../backend')
+
+import pandas as pd
+
+from data_store import (append_race_csv, convert_csv_to_parquet, race_fragment_name,
+                        read_manifest, write_manifest, write_season_partition)
+from file_parsers import NascarRaceDataParser, NascarResultsParser
+from nascar_dataclasses import ScrapedRaceObject
+
+
+RACE_TABLES = ('race_results', 'standings', 'race_data', 'loop_data')
+
+
+class RaceIngestion:
+    def __init__(self, data_dir: str = '../backend/data', export_csv: bool = True):
+        self.data_dir = data_dir
+        self.export_csv = export_csv
+        self.manifests = {}
+        return
+
+    def has_race(self, name: str, season: int, race_number: int) -> bool:
+        return race_number in self._manifest(name).get(season, ())
+
+    def ingest(self, data, season: int, race_number: int, name: str) -> bool:
+        if self.has_race(name, season, race_number):
+            return False
+        frame = pd.DataFrame(data)
+        write_season_partition(frame, name, season, self.data_dir, race_fragment_name(race_number))
+        if self.export_csv:
+            append_race_csv(frame, name, self.data_dir)
+        manifest = self._manifest(name)
+        manifest.setdefault(season, set()).add(race_number)
+        write_manifest(name, manifest, self.data_dir)
+        return True
+
+    def has_full_race(self, season: int, race_number: int) -> bool:
+        return all(self.has_race(name, season, race_number) for name in RACE_TABLES)
+
+    def ingest_scraped_race(self, scraped_race: ScrapedRaceObject) -> bool:
+        return self.ingest_tables(parse_scraped_race(scraped_race), scraped_race.season_year, scraped_race.race_number)
+
+    def ingest_tables(self, tables: dict, season: int, race_number: int) -> bool:
+        is_ingested = False
+        for name in RACE_TABLES:
+            is_ingested = self.ingest(tables[name], season, race_number, name) or is_ingested
+        return is_ingested
+
+    def _manifest(self, name: str) -> dict:
+        if name not in self.manifests:
+            if not os.path.isdir(os.path.join(self.data_dir, name)) and \
+                    os.path.exists(os.path.join(self.data_dir, f'{name}.csv')):
+                convert_csv_to_parquet(name, self.data_dir)
+            self.manifests[name] = read_manifest(name, self.data_dir)
+        return self.manifests[name]
+
+
+# Table rows for one race, kept apart from the writes so it can run in another thread or process
+def parse_scraped_race(scraped_race: ScrapedRaceObject) -> dict:
+    season, race_number = scraped_race.season_year, scraped_race.race_number
+    _, race_data = NascarRaceDataParser(season, race_number, scraped_race).fill_race_data()
+    results_parser = NascarResultsParser(season, race_number, scraped_race)
+    _, _, race_results, standings = results_parser.fill_results_data()
+    loop_data = results_parser.fill_loop_data()
+    return {'race_results': race_results, 'standings': standings, 'race_data': race_data, 'loop_data': loop_data}
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import time
+
+import requests
+
+from db_scrapper import RACING_REFERENCE_URL, dump_race_csv, is_complete_race, make_scraped_race, race_urls
+from page_fetcher import HtmlCache, HttpFetcher
+from page_parser import parse_loop_page, parse_race_page
+from race_ingestion import RaceIngestion, parse_scraped_race
+from scrap_scheduler import HostRateLimiter
+
+
+PIPELINE_STAGES = ('fetch', 'parse', 'persist')
+
+
+# fetch -> parse -> persist with a bounded queue between stages: while race N is parsed and written,
+# the fetch workers are already waiting on the network for the next races, and a slow stage
+# blocks the one before it once its queue is full
+class ScrapPipeline:
+    def __init__(self,
+                 ingestion: RaceIngestion,
+                 fetch_workers: int = 4,
+                 parse_workers: int = 1,
+                 persist_workers: int = 1,
+                 queue_size: int = 4,
+                 min_request_interval: float = 1.0,
+                 base_url: str = RACING_REFERENCE_URL,
+                 html_cache: HtmlCache = None,
+                 revalidate: bool = True,
+                 parser: str = 'html.parser',
+                 parse_executor=None,
+                 dump_dir: str = None,
+                 fetcher: HttpFetcher = None):
+        self.ingestion = ingestion
+        self.workers = {'fetch': fetch_workers, 'parse': parse_workers, 'persist': persist_workers}
+        self.queue_size = queue_size
+        self.base_url = base_url
+        self.parser = parser
+        # None runs parsing on the default thread pool, a ProcessPoolExecutor takes it off the GIL
+        self.parse_executor = parse_executor
+        self.dump_dir = dump_dir
+        self.fetcher = fetcher or HttpFetcher(html_cache, fetch_workers, revalidate, HostRateLimiter(min_request_interval))
+        self.stage_seconds = {}
+        self.ingest_lock = None
+        return
+
+    def run(self, jobs: list) -> list:
+        return asyncio.run(self.run_async(jobs))
+
+    # (season, race_number, is_ingested) per job in job order, is_ingested is None when the race failed or is not run yet
+    async def run_async(self, jobs: list) -> list:
+        self.stage_seconds = {stage: 0.0 for stage in PIPELINE_STAGES}
+        self.ingest_lock = asyncio.Lock()
+        results = {job: None for job in jobs}
+        pending = asyncio.Queue()
+        for job in jobs:
+            pending.put_nowait(job)
+        fetched = asyncio.Queue(maxsize=self.queue_size)
+        parsed = asyncio.Queue(maxsize=self.queue_size)
+
+        stages = [('fetch', self._fetch, pending, fetched),
+                  ('parse', self._parse, fetched, parsed),
+                  ('persist', self._persist, parsed, None)]
+        started = time.perf_counter()
+        tasks = {stage: [asyncio.create_task(self._worker(stage, handle, inbox, outbox, results))
+                         for _ in range(self.workers[stage])]
+                 for stage, handle, inbox, outbox in stages}
+        for _ in tasks['fetch']:
+            pending.put_nowait(None)
+        # A stage's workers are only told to stop once every worker of the stage before it is done
+        for (stage, _, _, outbox), next_stage in zip(stages, PIPELINE_STAGES[1:] + (None,)):
+            await asyncio.gather(*tasks[stage])
+            if next_stage is not None:
+                for _ in tasks[next_stage]:
+                    await outbox.put(None)
+        logging.info("Pipeline ingested %d races in %.2fs, busy seconds per stage %s",
+                     sum(result is not None for result in results.values()),
+                     time.perf_counter() - started,
+                     {stage: round(seconds, 2) for stage, seconds in self.stage_seconds.items()})
+        return [(season, race_number, results[(season, race_number)]) for season, race_number in jobs]
+
+    async def _worker(self, stage: str, handle, inbox: asyncio.Queue, outbox: asyncio.Queue, results: dict) -> None:
+        while True:
+            item = await inbox.get()
+            if item is None:
+                return
+            season, race_number, payload = item if stage != 'fetch' else (*item, None)
+            started = time.perf_counter()
+            try:
+                output = await handle(season, race_number, payload)
+            except Exception as e:
+                logging.error(f"Error in {stage} stage for race {season}-{race_number}: {e}")
+                output = None
+            self.stage_seconds[stage] += time.perf_counter() - started
+            if output is None:
+                continue
+            if outbox is None:
+                results[(season, race_number)] = output
+            else:
+                await outbox.put((season, race_number, output))
+
+    async def _fetch(self, season: int, race_number: int, _) -> tuple:
+        url, url_loop = race_urls(season, race_number, self.base_url)
+        race_html = await asyncio.to_thread(self.fetcher.fetch, url)
+        try:
+            loop_html = await asyncio.to_thread(self.fetcher.fetch, url_loop)
+        except requests.RequestException as e:
+            # Races that have not been run yet have no loop data page, the parse stage drops them
+            logging.info(f"No loop data page for race {season}-{race_number}: {e}")
+            loop_html = None
+        return race_html, loop_html
+
+    async def _parse(self, season: int, race_number: int, pages: tuple) -> tuple:
+        return await asyncio.get_running_loop().run_in_executor(self.parse_executor, parse_race, season, race_number,
+                                                                *pages, self.parser)
+
+    async def _persist(self, season: int, race_number: int, parsed_race: tuple) -> bool:
+        scraped_race, tables = parsed_race
+        if self.dump_dir is not None:
+            await asyncio.to_thread(dump_race_csv, scraped_race, self.dump_dir)
+        # Manifests and the CSV exports are shared by all races, only the CSV dumps run side by side
+        async with self.ingest_lock:
+            return await asyncio.to_thread(self.ingestion.ingest_tables, tables, season, race_number)
+
+
+def parse_race(season: int, race_number: int, race_html: str, loop_html: str, parser: str = 'html.parser') -> tuple:
+    sections = parse_race_page(race_html, parser)
+    if not is_complete_race(sections):
+        return None
+    if loop_html is None:
+        raise ValueError("loop data page is missing")
+    scraped_race = make_scraped_race(season, race_number, sections, parse_loop_page(loop_html, parser))
+    return scraped_race, parse_scraped_race(scraped_race)
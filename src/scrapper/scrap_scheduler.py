@@ -0,0 +1,124 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+from db_scrapper import RACING_REFERENCE_URL, make_chrome_driver, scrap_race_data
+from page_fetcher import HtmlCache, HttpFetcher, HttpPageDriver
+
+
+class HostRateLimiter:
+    def __init__(self, min_interval: float = 1.0):
+        self.min_interval = min_interval
+        self.next_request = {}
+        self.lock = threading.Lock()
+        return
+
+    def wait(self, url: str) -> None:
+        host = urlparse(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            request_time = max(now, self.next_request.get(host, now))
+            self.next_request[host] = request_time + self.min_interval
+        if request_time > now:
+            time.sleep(request_time - now)
+        return
+
+
+class BrowserPool:
+    def __init__(self, size: int, make_driver=make_chrome_driver):
+        self.drivers = queue.Queue()
+        self.all_drivers = []
+        for _ in range(size):
+            driver = make_driver()
+            self.all_drivers.append(driver)
+            self.drivers.put(driver)
+        return
+
+    def acquire(self):
+        return self.drivers.get()
+
+    def release(self, driver) -> None:
+        self.drivers.put(driver)
+        return
+
+    def close(self) -> None:
+        for driver in self.all_drivers:
+            try:
+                driver.quit()
+            except Exception as e:
+                logging.error(f"Error closing browser: {e}")
+        self.all_drivers = []
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return
+
+
+FETCH_MODES = ('browser', 'http')
+
+
+class ScrapScheduler:
+    def __init__(self,
+                 n_browsers: int = 4,
+                 min_request_interval: float = 1.0,
+                 base_url: str = RACING_REFERENCE_URL,
+                 make_driver=make_chrome_driver,
+                 scrap=scrap_race_data,
+                 fetch_mode: str = 'browser',
+                 html_cache: HtmlCache = None,
+                 revalidate: bool = True,
+                 parser: str = 'html.parser',
+                 dump_dir: str = None):
+        if fetch_mode not in FETCH_MODES:
+            raise ValueError(f"Unknown fetch mode '{fetch_mode}', expected one of {FETCH_MODES}")
+        self.n_browsers = n_browsers
+        self.rate_limiter = HostRateLimiter(min_request_interval)
+        self.base_url = base_url
+        self.make_driver = make_driver
+        self.scrap = scrap
+        self.parser = parser
+        self.dump_dir = dump_dir
+        self.fetcher = None
+        if fetch_mode == 'http':
+            # The fetcher rate limits network requests itself, cache hits are served without waiting
+            self.fetcher = HttpFetcher(html_cache, n_browsers, revalidate, self.rate_limiter)
+            self.make_driver = lambda: HttpPageDriver(self.fetcher, make_driver)
+        return
+
+    def run(self, jobs: list):
+        with BrowserPool(self.n_browsers, self.make_driver) as pool, \
+                ThreadPoolExecutor(max_workers=self.n_browsers) as executor:
+            futures = {executor.submit(self._scrap_job, pool, season, race_number): (season, race_number)
+                       for season, race_number in jobs}
+            for future in as_completed(futures):
+                season, race_number = futures[future]
+                try:
+                    scraped_race = future.result()
+                except Exception as e:
+                    logging.error(f"Error scraping race {season}-{race_number}: {e}")
+                    scraped_race = None
+                yield season, race_number, scraped_race
+
+    def _scrap_job(self, pool: BrowserPool, season: int, race_number: int):
+        driver = pool.acquire()
+        try:
+            get_page = driver.get if self.fetcher is not None else self._rate_limited(driver)
+            return self.scrap(season, race_number, driver=driver, base_url=self.base_url, get_page=get_page,
+                              parser=self.parser, dump_dir=self.dump_dir)
+        finally:
+            pool.release(driver)
+
+    def _rate_limited(self, driver):
+        def get_page(url: str) -> None:
+            self.rate_limiter.wait(url)
+            driver.get(url)
+            return
+
+        return get_page